@@ -0,0 +1,181 @@
+"""Entity fan-out: what one state update costs across every entity type.
+
+Sets up one gateway with 48 thermostats and every optional entity enabled
+(climate, room/floor temperature, humidity and status sensors, local
+override and average switches, valve binary sensors). For each scenario a
+poll is run and its dispatch measured, once with every entity updated after
+each poll (broadcast) and once with only the entities of thermostats whose
+variables changed (changed_only, the default). Reported per poll:
+
+  ms            wall time of the poll including all entity state writes
+  writes        entity state writes
+  changes       writes that changed the state machine (state_changed events)
+  <property>    evaluations of extra_state_attributes, device_info,
+                preset_mode and hvac_action
+
+Scenarios: nothing changed, one room temperature changed, a typical poll
+(a third of the rooms drift) and a system variable changed.
+
+Run from the repository root:
+
+  python -m benchmarks.fanout [--repeats 20] [--json]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+from collections import Counter
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.helpers.entity import Entity
+
+from custom_components.uponorx265 import binary_sensor, climate, helper, sensor, switch
+from custom_components.uponorx265.const import CONF_BINARY_SENSOR_VALVE, CONF_SWITCH_SENSOR_AVG
+
+from .harness import (
+    SimulatedGateway,
+    SimulatedNetwork,
+    async_add_gateway_entry,
+    async_create_home_assistant,
+    get_proxy,
+)
+
+PROPERTIES = ("extra_state_attributes", "device_info", "preset_mode", "hvac_action")
+ENTITY_MODULES = (helper, climate, sensor, switch, binary_sensor)
+
+
+def _scenario_unchanged(gateway):
+    pass
+
+
+def _scenario_one_room(gateway):
+    var = f"{gateway.thermostats[0]}_room_temperature"
+    gateway.vars[var] = str(int(gateway.vars[var]) + 1)
+
+
+def _scenario_typical(gateway):
+    gateway.step()
+
+
+def _scenario_system(gateway):
+    var = "cust_Temporary_ECO_Activation"
+    gateway.vars[var] = "0" if gateway.vars[var] == "1" else "1"
+
+
+SCENARIOS = {
+    "unchanged": _scenario_unchanged,
+    "one_room": _scenario_one_room,
+    "typical": _scenario_typical,
+    "system": _scenario_system,
+}
+
+
+class Instrumentation:
+    """Counts property evaluations on the integration's entity classes and
+    entity state writes while installed."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self._restore = []
+
+    def _counting_property(self, name, original):
+        counts = self.counts
+
+        def getter(entity):
+            counts[name] += 1
+            return original.fget(entity)
+
+        return property(getter)
+
+    def install(self):
+        for module in ENTITY_MODULES:
+            for cls in vars(module).values():
+                if not isinstance(cls, type) or cls.__module__ != module.__name__:
+                    continue
+                for name in PROPERTIES:
+                    original = cls.__dict__.get(name)
+                    if isinstance(original, property):
+                        setattr(cls, name, self._counting_property(name, original))
+                        self._restore.append((cls, name, original))
+
+        counts = self.counts
+        write = Entity._async_write_ha_state
+
+        def counting_write(entity):
+            counts["writes"] += 1
+            return write(entity)
+
+        Entity._async_write_ha_state = counting_write
+        self._restore.append((Entity, "_async_write_ha_state", write))
+
+    def uninstall(self):
+        for cls, name, original in reversed(self._restore):
+            setattr(cls, name, original)
+        self._restore = []
+
+
+async def async_main(args):
+    network = SimulatedNetwork()
+    hass = await async_create_home_assistant(network)
+    gateway = SimulatedGateway(humidity_every=1, floor_every=1)
+    entry = await async_add_gateway_entry(
+        hass, network, gateway, {CONF_SWITCH_SENSOR_AVG: True, CONF_BINARY_SENSOR_VALVE: True}
+    )
+    proxy = get_proxy(hass, entry)
+    entities = Counter(state.domain for state in hass.states.async_all())
+
+    instrumentation = Instrumentation()
+    hass.bus.async_listen(EVENT_STATE_CHANGED, lambda event: instrumentation.counts.update(["changes"]))
+    instrumentation.install()
+
+    results = []
+    for mode in ("broadcast", "changed_only"):
+        proxy.set_full_broadcast(mode == "broadcast")
+        for scenario, apply in SCENARIOS.items():
+            instrumentation.counts.clear()
+            elapsed = 0.0
+            for _ in range(args.repeats):
+                apply(gateway)
+                started = time.perf_counter()
+                await proxy.async_update()
+                await hass.async_block_till_done()
+                elapsed += time.perf_counter() - started
+            counts = instrumentation.counts
+            results.append({
+                "mode": mode,
+                "scenario": scenario,
+                "ms": round(elapsed * 1000 / args.repeats, 3),
+                "writes": round(counts["writes"] / args.repeats, 1),
+                "changes": round(counts["changes"] / args.repeats, 1),
+                **{name: round(counts[name] / args.repeats, 1) for name in PROPERTIES},
+            })
+
+    instrumentation.uninstall()
+    await hass.async_stop(force=True)
+    return {"entities": dict(entities), "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--repeats", type=int, default=20, help="polls per scenario and mode")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    output = asyncio.run(async_main(args))
+    if args.json:
+        print(json.dumps(output, indent=2))
+        return
+
+    print("entities: " + ", ".join(f"{domain}={count}" for domain, count in sorted(output["entities"].items())))
+    results = output["results"]
+    columns = list(results[0])
+    widths = [max(len(column), *(len(str(result[column])) for result in results)) for column in columns]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for result in results:
+        print("  ".join(str(result[column]).ljust(width) for column, width in zip(columns, widths)))
+
+
+if __name__ == "__main__":
+    main()
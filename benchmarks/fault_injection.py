@@ -0,0 +1,147 @@
+"""Inject gateway faults and measure how the integration degrades and recovers.
+
+For each fault type a simulated gateway is polled on virtual time: a healthy
+warm-up, an outage of --outage seconds, then recovery. Polls follow the same
+backoff as the shared poll scheduler. Reported per fault:
+
+  detect_s      outage start until the proxy reports the gateway unavailable
+  recover_s     gateway healthy again (just after a failed poll, the worst
+                case under backoff) until the proxy is available again
+  polls         poll attempts during the outage
+  requests      HTTP requests during the outage (retries included)
+  reloads       automatic config entry reloads triggered
+  loop_ms_max   worst event loop time spent in one poll (wall clock)
+  loop_ms_total event loop time spent polling during the outage (wall clock)
+
+Run from the repository root:
+
+  python -m benchmarks.fault_injection [--outage 900] [--json]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+from custom_components.uponorx265 import jnap
+from custom_components.uponorx265.const import POLL_BACKOFF_MAX, SCAN_INTERVAL
+from custom_components.uponorx265.scheduler import backoff_delay
+
+from .harness import (
+    FAULTS,
+    SimulatedGateway,
+    SimulatedSession,
+    VirtualClock,
+    async_create_hass,
+    create_proxy,
+    elapsed_ms,
+)
+
+WARMUP_POLLS = 3
+MAX_RECOVERY_POLLS = 20
+
+
+async def _async_poll(proxy, gateway, session, loop_times):
+    gateway.step()
+    session.begin_poll()
+    started = time.perf_counter()
+    result = await proxy.async_update()
+    loop_times.append(elapsed_ms(started))
+    return result
+
+
+async def async_run_fault(hass, fault, outage, interval, max_backoff):
+    clock = VirtualClock()
+    with clock:
+        gateway = SimulatedGateway()
+        session = SimulatedSession(gateway, clock)
+        proxy = create_proxy(hass, session, unique_id=f"uponorx265_fault_{fault}")
+        loop_times = []
+
+        for _ in range(WARMUP_POLLS):
+            await _async_poll(proxy, gateway, session, loop_times)
+            clock.advance(interval)
+
+        session.fault = fault
+        requests = session.requests
+        reloads = hass.config_entries.reloads
+        outage_started = clock.now()
+        detected = None
+        failures = 0
+        polls = 0
+        loop_times = []
+        while (clock.now() - outage_started).total_seconds() < outage:
+            result = await _async_poll(proxy, gateway, session, loop_times)
+            polls += 1
+            if detected is None and not proxy.is_available():
+                detected = (clock.now() - outage_started).total_seconds()
+            failures = failures + 1 if result is False else 0
+            last_failed = clock.now()
+            clock.advance(backoff_delay(failures, interval, max_backoff))
+
+        outage_loop_times = loop_times
+        outage_requests = session.requests - requests
+        outage_reloads = hass.config_entries.reloads - reloads
+
+        # Worst case: the gateway came back right after the last failed poll,
+        # so the current backoff wait is all recovery latency
+        session.fault = None
+        recovery = None
+        for _ in range(MAX_RECOVERY_POLLS):
+            result = await _async_poll(proxy, gateway, session, [])
+            if proxy.is_available():
+                recovery = (clock.now() - last_failed).total_seconds()
+                break
+            failures = failures + 1 if result is False else 0
+            clock.advance(backoff_delay(failures, interval, max_backoff))
+
+    return {
+        "fault": fault,
+        "detect_s": round(detected, 1) if detected is not None else None,
+        "recover_s": round(recovery, 1) if recovery is not None else None,
+        "polls": polls,
+        "requests": outage_requests,
+        "reloads": outage_reloads,
+        "loop_ms_max": max(outage_loop_times, default=0),
+        "loop_ms_total": round(sum(outage_loop_times), 3),
+    }
+
+
+async def async_main(args):
+    # Retry waits are simulated on the virtual clock instead of slept
+    jnap.RETRY_DELAY_SECONDS = 0
+    hass = await async_create_hass()
+    results = []
+    for fault in args.faults:
+        results.append(await async_run_fault(hass, fault, args.outage, args.interval, args.max_backoff))
+    await hass.async_stop(force=True)
+    return results
+
+
+def _print_table(results):
+    columns = list(results[0])
+    widths = [max(len(column), *(len(str(result[column])) for result in results)) for column in columns]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for result in results:
+        print("  ".join(str(result[column]).ljust(width) for column, width in zip(columns, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--outage", type=float, default=900, help="outage length in simulated seconds")
+    parser.add_argument("--interval", type=float, default=SCAN_INTERVAL.total_seconds(), help="poll interval in seconds")
+    parser.add_argument("--max-backoff", type=float, default=POLL_BACKOFF_MAX.total_seconds(), help="longest poll backoff in seconds")
+    parser.add_argument("--faults", nargs="+", choices=FAULTS, default=list(FAULTS))
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    results = asyncio.run(async_main(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        _print_table(results)
+
+
+if __name__ == "__main__":
+    main()
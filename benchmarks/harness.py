@@ -0,0 +1,361 @@
+"""Shared pieces for the benchmark scripts: a simulated R-208 gateway, an
+in-process HTTP session that serves it (with optional fault injection), a
+virtual clock and a minimal Home Assistant instance to run UponorStateProxy in.
+
+The scripts need Home Assistant installed and are run from the repository
+root, e.g. `python -m benchmarks.fault_injection`.
+"""
+import asyncio
+import ipaddress
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+from homeassistant import bootstrap, loader
+from homeassistant.config_entries import SOURCE_USER, ConfigEntries, ConfigEntry
+from homeassistant.const import CONF_HOST, CONF_NAME
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import DATA_CLIENTSESSION
+from homeassistant.helpers.storage import Store
+import homeassistant.util.dt as dt_util
+
+from custom_components.uponorx265 import UponorStateProxy
+from custom_components.uponorx265 import jnap
+from custom_components.uponorx265.config_flow import DomainConfigFlow
+from custom_components.uponorx265.const import DOMAIN, STORAGE_KEY, STORAGE_VERSION
+from custom_components.uponorx265.jnap import UponorJnap
+from custom_components.uponorx265.scheduler import UponorPollScheduler
+
+CUSTOM_COMPONENTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "custom_components")
+
+FAULTS = ("timeout", "reset", "http_5xx", "truncated_json", "missing_vars")
+
+GATEWAY_RTT = 0.05
+
+
+def raw_temperature(celsius):
+    return int(round(celsius * 18 + 320))
+
+
+class SimulatedGateway:
+    """Variable table of an R-208 with `controllers` x `thermostats` rooms.
+
+    Every `humidity_every`-th room reports humidity and every `floor_every`-th
+    has a floor sensor.
+
+    step() moves the simulated house on by one poll: RF sensors jitter by
+    one raw unit (about 0.05 °C), actuators switch and PWM outputs drift.
+    """
+
+    def __init__(self, controllers=4, thermostats=12, seed=0, humidity_every=3, floor_every=4):
+        self._random = random.Random(seed)
+        self.thermostats = [
+            f"C{c}_T{t}" for c in range(1, controllers + 1) for t in range(1, thermostats + 1)
+        ]
+        self.vars = {
+            "sys_heat_cool_mode": "0",
+            "sys_forced_eco_mode": "0",
+            "sys_cooling_available": "1",
+            "sys_heat_cool_offset": "36",
+            "cust_Temporary_ECO_Activation": "0",
+            "cust_ip_device": "AABBCCDDEEFF",
+            "cust_SW_version_update": "1.22_20240101",
+        }
+        for c in range(1, 5):
+            self.vars[f"sys_controller_{c}_presence"] = "1" if c <= controllers else "0"
+        for c in range(1, controllers + 1):
+            self.vars.update({
+                f"controller{c}_id": f"41950{c:04d}",
+                f"C{c}_hardware_type": "0",
+                f"C{c}_sw_version": "290",
+                f"C{c}_average_room_temperature": str(raw_temperature(21)),
+                f"cust_Controller{c}_Name": f"Controller {c}",
+                f"C{c}stat_out_module_com_lost": "0",
+                f"C{c}stat_general_system_alarm": "0",
+            })
+            for t in range(1, 13):
+                self.vars[f"C{c}_thermostat_{t}_presence"] = "1" if t <= thermostats else "0"
+        for index, thermostat in enumerate(self.thermostats):
+            c, t = thermostat[1], thermostat.split("_T")[1]
+            self.vars.update({
+                f"C{c}_thermostat{t}_id": f"2692{index:06d}",
+                f"cust_{thermostat}_name": f"Room {index + 1}",
+                f"{thermostat}_thermostat_type": "0",
+                f"{thermostat}_sw_version": "4096",
+                f"{thermostat}_room_temperature": str(raw_temperature(20 + self._random.random() * 2)),
+                f"{thermostat}_setpoint": str(raw_temperature(21)),
+                f"{thermostat}_minimum_setpoint": str(raw_temperature(5)),
+                f"{thermostat}_maximum_setpoint": str(raw_temperature(35)),
+                f"{thermostat}_eco_offset": "72",
+                f"{thermostat}_rh": str(40 + index % 20) if index % humidity_every == 0 else "0",
+                f"{thermostat}_rh_control": "0",
+                f"{thermostat}_external_temperature": str(raw_temperature(24)) if index % floor_every == 0 else "32767",
+                f"{thermostat}_stat_cb_actuator": "0",
+                f"{thermostat}_ufh_pwm_output": "0",
+                f"{thermostat}_stat_cb_comfort_eco_mode": "0",
+                f"{thermostat}_pub_setpoint_override": "0",
+                f"{thermostat}_system_device_public": "1",
+                f"{thermostat}_sensor_only": "0",
+                f"{thermostat}_stat_battery_error": "0",
+                f"{thermostat}_stat_valve_position_err": "0",
+                f"{thermostat}_stat_air_sensor_error": "0",
+                f"{thermostat}_stat_external_sensor_err": "0",
+                f"{thermostat}_stat_rh_sensor_error": "0",
+                f"{thermostat}_stat_rf_error": "0",
+                f"{thermostat}_stat_tamper_alarm": "0",
+                f"C{c}_channel_{t}_ave_temp": "1",
+            })
+
+    def step(self):
+        rnd = self._random
+        for thermostat in self.thermostats:
+            if rnd.random() < 0.3:
+                var = f"{thermostat}_room_temperature"
+                self.vars[var] = str(int(self.vars[var]) + rnd.choice((-1, 1)))
+            if rnd.random() < 0.05:
+                var = f"{thermostat}_stat_cb_actuator"
+                self.vars[var] = "0" if self.vars[var] == "1" else "1"
+            if rnd.random() < 0.2:
+                self.vars[f"{thermostat}_ufh_pwm_output"] = str(rnd.randint(0, 100))
+
+    def get_attributes_body(self):
+        return json.dumps({
+            "result": "OK",
+            "output": {"vars": [
+                {"waspVarName": name, "waspVarValue": value} for name, value in self.vars.items()
+            ]},
+        }).encode()
+
+    def set_attributes(self, payload):
+        for item in payload.get("vars", []):
+            self.vars[item["waspVarName"]] = item["waspVarValue"]
+
+
+class VirtualClock:
+    """Replaces dt_util.now so hours of polling can be simulated in seconds."""
+
+    def __init__(self):
+        self._now = dt_util.now()
+        self._real_now = dt_util.now
+
+    def now(self, time_zone=None):
+        return self._now
+
+    def advance(self, seconds):
+        self._now += timedelta(seconds=seconds)
+
+    def __enter__(self):
+        dt_util.now = self.now
+        return self
+
+    def __exit__(self, *exc):
+        dt_util.now = self._real_now
+
+
+class _FakeResponse:
+    def __init__(self, url, status, body):
+        self._url = url
+        self.status = status
+        self._body = body
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            url = URL(self._url)
+            raise aiohttp.ClientResponseError(
+                aiohttp.RequestInfo(url, "POST", CIMultiDictProxy(CIMultiDict()), url),
+                (),
+                status=self.status,
+                message="Service Unavailable",
+            )
+
+    async def read(self):
+        return self._body
+
+
+class _FakeRequest:
+    def __init__(self, session, url, headers, payload):
+        self._session = session
+        self._url = url
+        self._headers = headers
+        self._payload = payload
+
+    async def __aenter__(self):
+        return self._session.respond(self._url, self._headers, self._payload)
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class SimulatedSession:
+    """Stands in for the aiohttp session handed to UponorJnap.
+
+    Requests are answered from a SimulatedGateway. Setting `fault` to one of
+    FAULTS makes every request fail the way that kind of outage would, below
+    the retry logic of UponorJnap.post. With a VirtualClock each request
+    advances simulated time by its round trip or timeout, plus the retry delay
+    UponorJnap would sleep before the next attempt.
+    """
+
+    def __init__(self, gateway, clock=None):
+        self.gateway = gateway
+        self.fault = None
+        self.requests = 0
+        self.failed_requests = 0
+        self._clock = clock
+        self._failed_in_row = 0
+        # Captured here because the benchmarks zero the real sleep
+        self._retry_delay = jnap.RETRY_DELAY_SECONDS
+
+    def post(self, url, headers=None, json=None, ssl=None, timeout=None):
+        return _FakeRequest(self, url, headers or {}, json or {})
+
+    def begin_poll(self):
+        self._failed_in_row = 0
+
+    def _advance(self, seconds):
+        if self._clock is not None:
+            self._clock.advance(seconds)
+
+    def _failed(self):
+        self.failed_requests += 1
+        if self._failed_in_row < jnap.REQUEST_RETRIES:
+            self._advance(self._retry_delay)
+        self._failed_in_row += 1
+
+    def respond(self, url, headers, payload):
+        self.requests += 1
+        action = headers.get("x-jnap-action", "").rsplit("/", 1)[-1]
+        fault = self.fault
+
+        if fault == "timeout":
+            self._advance(jnap.REQUEST_TIMEOUT.total)
+            self._failed()
+            raise asyncio.TimeoutError()
+        self._advance(GATEWAY_RTT)
+        if fault == "reset":
+            self._failed()
+            raise aiohttp.ServerDisconnectedError()
+        if fault == "http_5xx":
+            self._failed()
+            return _FakeResponse(url, 503, b"")
+
+        if action == "SetAttributes":
+            self.gateway.set_attributes(payload)
+            body = b'{"result":"OK"}'
+        elif fault == "missing_vars":
+            # Valid JSON, so post() succeeds and get_data() rejects it
+            return _FakeResponse(url, 200, b'{"result":"OK","output":{}}')
+        else:
+            body = self.gateway.get_attributes_body()
+        if fault == "truncated_json":
+            self._failed()
+            return _FakeResponse(url, 200, body[: len(body) // 2])
+
+        self._failed_in_row = 0
+        return _FakeResponse(url, 200, body)
+
+
+class SimulatedNetwork:
+    """Routes requests to one SimulatedSession per gateway host.
+
+    Installed as Home Assistant's shared aiohttp session, so config entries
+    set up through the real integration code talk to simulated gateways.
+    """
+
+    def __init__(self, clock=None):
+        self.sessions = {}
+        self._clock = clock
+        self._next_address = ipaddress.ip_address("10.0.0.1")
+
+    def add_gateway(self, gateway):
+        host = str(self._next_address)
+        self._next_address += 1
+        self.sessions[host] = SimulatedSession(gateway, self._clock)
+        return host
+
+    def post(self, url, **kwargs):
+        return self.sessions[URL(url).host].post(url, **kwargs)
+
+
+class ReloadCounter:
+    """Takes the place of hass.config_entries and counts automatic reloads."""
+
+    def __init__(self):
+        self.reloads = 0
+
+    async def async_reload(self, entry_id):
+        self.reloads += 1
+        return True
+
+
+async def async_create_hass(config_dir=None):
+    config_dir = config_dir or tempfile.mkdtemp(prefix="uponorx265-bench-")
+    hass = HomeAssistant(config_dir)
+    hass.config_entries = ReloadCounter()
+    return hass
+
+
+async def async_create_home_assistant(network, config_dir=None):
+    """A Home Assistant with registries and config entries loaded.
+
+    This repository's custom_components are mounted into the config dir and
+    all HTTP requests go to `network`. The poll scheduler gets a timer that
+    never fires, so the benchmark decides when gateways are polled.
+    """
+    config_dir = config_dir or tempfile.mkdtemp(prefix="uponorx265-bench-")
+    if not os.path.exists(os.path.join(config_dir, "custom_components")):
+        os.symlink(CUSTOM_COMPONENTS, os.path.join(config_dir, "custom_components"))
+    hass = HomeAssistant(config_dir)
+    loader.async_setup(hass)
+    hass.config.skip_pip = True
+    hass.config_entries = ConfigEntries(hass, {})
+    await bootstrap.async_load_base_functionality(hass)
+    hass.data[DATA_CLIENTSESSION] = {(True, 0): network}
+    hass.data[DOMAIN] = {"scheduler": UponorPollScheduler(hass, interval=timedelta(days=365))}
+    return hass
+
+
+async def async_add_gateway_entry(hass, network, gateway, options=None):
+    """Set up a config entry for `gateway` through the integration's own code."""
+    host = network.add_gateway(gateway)
+    name = f"uponor_{host.replace('.', '_')}"
+    entry = ConfigEntry(
+        version=DomainConfigFlow.VERSION,
+        minor_version=DomainConfigFlow.MINOR_VERSION,
+        domain=DOMAIN,
+        title=name,
+        data={CONF_HOST: host, CONF_NAME: name, **(options or {})},
+        source=SOURCE_USER,
+        options={},
+        unique_id=name,
+    )
+    await hass.config_entries.async_add(entry)
+    await hass.async_block_till_done()
+    return entry
+
+
+def get_proxy(hass, entry):
+    return hass.data[entry.unique_id]["state_proxy"]
+
+
+def create_proxy(hass, session, unique_id="uponorx265_bench", options=None, client=None):
+    """Build an UponorStateProxy wired to the simulated session."""
+    data = {CONF_HOST: "192.0.2.1", CONF_NAME: unique_id, **(options or {})}
+    entry = SimpleNamespace(entry_id=unique_id, data=data, options={}, unique_id=unique_id)
+    store = Store(hass, STORAGE_VERSION, f"{STORAGE_KEY}_{unique_id}")
+    client = client or UponorJnap("192.0.2.1", session)
+    proxy = UponorStateProxy(hass, "192.0.2.1", session, store, unique_id, entry, client=client)
+    hass.data[unique_id] = {"state_proxy": proxy, "thermostats": []}
+    return proxy
+
+
+def elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 3)
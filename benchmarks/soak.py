@@ -0,0 +1,174 @@
+"""Soak test: many gateways polled for hours of simulated time.
+
+Each round sets up N config entries (default 1, 10 and 50) through the real
+integration code, every one against a simulated gateway with 4 controllers
+and 48 thermostats, then polls all of them back to back for --hours of
+simulated 30 s polls, changing a setpoint on each gateway every
+--write-every polls. Between samples it records:
+
+  rss_mib        resident set size of the process
+  objects        objects tracked by the garbage collector
+  tasks          asyncio tasks alive after the entity updates have drained
+  tasks_per_poll asyncio tasks created per poll (entity updates included)
+  subscriptions  dispatcher subscriptions
+  poll_ms        per-poll latency (poll plus entity updates), p50 / p95 / max
+
+A leak shows up as growth between the first and last sample of a round.
+
+Run from the repository root:
+
+  python -m benchmarks.soak [--entries 1 10 50] [--hours 1] [--samples 8] [--json]
+"""
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import resource
+import time
+
+from homeassistant.helpers.dispatcher import DATA_DISPATCHER
+
+from custom_components.uponorx265.const import SCAN_INTERVAL
+from custom_components.uponorx265.stats import RollingWindow
+
+from .harness import (
+    SimulatedGateway,
+    SimulatedNetwork,
+    async_add_gateway_entry,
+    async_create_home_assistant,
+    elapsed_ms,
+    get_proxy,
+)
+
+_PAGE_SIZE = resource.getpagesize()
+
+
+def rss_mib():
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            return round(int(statm.read().split()[1]) * _PAGE_SIZE / 2**20, 1)
+    except OSError:
+        # Peak rather than current RSS where /proc is unavailable (kilobytes on Linux, bytes on macOS)
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def dispatcher_subscriptions(hass):
+    return sum(len(targets) for targets in hass.data.get(DATA_DISPATCHER, {}).values())
+
+
+class TaskCounter:
+    """Task factory counting every task created on the loop."""
+
+    def __init__(self):
+        self.created = 0
+
+    def __call__(self, loop, coro, **kwargs):
+        self.created += 1
+        return asyncio.Task(coro, loop=loop, **kwargs)
+
+
+def sample(hass, polls):
+    gc.collect()
+    return {
+        "polls": polls,
+        "rss_mib": rss_mib(),
+        "objects": len(gc.get_objects()),
+        "tasks": len(asyncio.all_tasks()),
+        "subscriptions": dispatcher_subscriptions(hass),
+    }
+
+
+async def async_run_round(entries, cycles, samples, write_every):
+    network = SimulatedNetwork()
+    hass = await async_create_home_assistant(network)
+    gateways = []
+    started = time.perf_counter()
+    for index in range(entries):
+        gateway = SimulatedGateway(seed=index)
+        entry = await async_add_gateway_entry(hass, network, gateway)
+        gateways.append((gateway, get_proxy(hass, entry)))
+    setup_ms = elapsed_ms(started)
+
+    latency = RollingWindow(size=cycles * entries)
+    history = [sample(hass, 0)]
+    sample_every = max(cycles // samples, 1)
+    task_counter = TaskCounter()
+    asyncio.get_running_loop().set_task_factory(task_counter)
+    for cycle in range(1, cycles + 1):
+        for gateway, proxy in gateways:
+            if write_every and cycle % write_every == 0:
+                thermostat = gateway.thermostats[cycle % len(gateway.thermostats)]
+                await proxy.async_set_setpoint(thermostat, 20 + cycle % 3)
+            gateway.step()
+            poll_started = time.perf_counter()
+            await proxy.async_update()
+            await hass.async_block_till_done()
+            latency.add(elapsed_ms(poll_started))
+        if cycle % sample_every == 0 or cycle == cycles:
+            history.append(sample(hass, cycle * entries))
+    asyncio.get_running_loop().set_task_factory(None)
+
+    summary = latency.summary()
+    result = {
+        "entries": entries,
+        "entities": len(hass.states.async_all()),
+        "setup_ms": setup_ms,
+        "polls": cycles * entries,
+        "poll_ms_p50": summary["p50"],
+        "poll_ms_p95": summary["p95"],
+        "poll_ms_max": summary["max"],
+        "tasks_per_poll": round(task_counter.created / (cycles * entries), 1),
+        "samples": history,
+    }
+    for key in ("rss_mib", "objects", "tasks", "subscriptions"):
+        # Growth after the first cycle, once caches and registries have filled
+        baseline = history[1] if len(history) > 2 else history[0]
+        result[f"{key}_growth"] = round(history[-1][key] - baseline[key], 1)
+
+    await hass.async_stop(force=True)
+    return result
+
+
+async def async_main(args):
+    cycles = max(int(args.hours * 3600 / SCAN_INTERVAL.total_seconds()), 1)
+    results = []
+    for entries in args.entries:
+        results.append(await async_run_round(entries, cycles, args.samples, args.write_every))
+    return results
+
+
+def _print_results(results):
+    columns = (
+        "entries", "entities", "setup_ms", "polls", "poll_ms_p50", "poll_ms_p95", "poll_ms_max", "tasks_per_poll",
+        "rss_mib_growth", "objects_growth", "tasks_growth", "subscriptions_growth",
+    )
+    widths = [max(len(column), *(len(str(result[column])) for result in results)) for column in columns]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for result in results:
+        print("  ".join(str(result[column]).ljust(width) for column, width in zip(columns, widths)))
+    for result in results:
+        print(f"\n{result['entries']} entries:")
+        for point in result["samples"]:
+            print("  " + "  ".join(f"{key}={value}" for key, value in point.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--entries", type=int, nargs="+", default=[1, 10, 50], help="config entries per round")
+    parser.add_argument("--hours", type=float, default=1, help="simulated hours of polling per round")
+    parser.add_argument("--write-every", type=int, default=10, help="polls between setpoint writes (0 disables)")
+    parser.add_argument("--samples", type=int, default=8, help="memory/task samples per round")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    results = asyncio.run(async_main(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        _print_results(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""Startup cost: importing the integration and setting up its config entries.
+
+Import: a fresh interpreter first imports the Home Assistant modules that
+are always loaded when an integration is set up, then the integration. The
+cumulative import time of the integration package (and of its platform
+modules) is read from `python -X importtime`, together with the modules it
+pulled in that took longest.
+
+Setup: each options profile runs in a fresh interpreter, so Home Assistant
+components imported by one profile do not make the next look faster. It
+sets up one gateway (4 controllers x 12 thermostats) through the
+integration's own code and reports:
+
+  first_ms     setup of the first entry, including the platform components
+               Home Assistant sets up for it
+  next_ms      mean setup of further entries on the same instance
+  reload_ms    mean reload of an entry
+  platforms    platforms forwarded for the entry
+  entities     entities created for the first entry
+
+Profiles: default options, and every optional entity enabled.
+
+Run from the repository root:
+
+  python -m benchmarks.startup [--entries 5] [--repeats 5] [--json]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import subprocess
+import sys
+import time
+
+BASELINE_MODULES = (
+    "homeassistant.core",
+    "homeassistant.config_entries",
+    "homeassistant.helpers.entity",
+    "homeassistant.helpers.entity_platform",
+    "homeassistant.helpers.storage",
+    "homeassistant.helpers.aiohttp_client",
+    "homeassistant.helpers.device_registry",
+    "homeassistant.helpers.entity_registry",
+)
+PACKAGE = "custom_components.uponorx265"
+PLATFORM_MODULES = ("climate", "sensor", "switch", "binary_sensor")
+
+PROFILES = {
+    "default": {},
+    "all": {"binary_sensor_valve": True, "switch_sensor_avg": True, "aggregate_sensors": True},
+}
+
+
+def _parse_importtime(stderr):
+    """{module: (self us, cumulative us)} from `python -X importtime` output."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        try:
+            own, cumulative, module = line[len("import time:"):].split("|")
+            times[module.strip()] = (int(own), int(cumulative))
+        except ValueError:
+            continue
+    return times
+
+
+def measure_import(repeats):
+    """Median cumulative import times over `repeats` fresh interpreters."""
+    statement = "; ".join(f"import {module}" for module in BASELINE_MODULES)
+    statement += f"; import {PACKAGE}; " + "; ".join(f"import {PACKAGE}.{module}" for module in PLATFORM_MODULES)
+    runs = []
+    for _ in range(repeats):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", statement],
+            capture_output=True, text=True, check=True,
+        )
+        runs.append(_parse_importtime(result.stderr))
+
+    def median(values):
+        values = sorted(values)
+        return values[len(values) // 2]
+
+    modules = [PACKAGE] + [f"{PACKAGE}.{module}" for module in PLATFORM_MODULES]
+    result = {
+        module: round(median([run.get(module, (0, 0))[1] for run in runs]) / 1000, 2)
+        for module in modules
+    }
+    # Modules first imported after the Home Assistant baseline, by cumulative time
+    last = runs[-1]
+    names = list(last)
+    start = max(names.index(module) for module in BASELINE_MODULES if module in last) + 1
+    slowest = sorted(
+        ((module, last[module][1]) for module in names[start:] if not module.startswith(PACKAGE)),
+        key=lambda item: -item[1],
+    )[:8]
+    return {"ms": result, "slowest_dependencies": {module: round(us / 1000, 2) for module, us in slowest}}
+
+
+async def async_measure_setup(profile, entries, repeats):
+    from homeassistant.helpers import entity_platform
+
+    from .harness import SimulatedGateway, SimulatedNetwork, async_add_gateway_entry, async_create_home_assistant
+
+    network = SimulatedNetwork()
+    hass = await async_create_home_assistant(network)
+    options = PROFILES[profile]
+
+    started = time.perf_counter()
+    entry = await async_add_gateway_entry(hass, network, SimulatedGateway(), options)
+    first = time.perf_counter() - started
+    platforms = sorted(platform.domain for platform in entity_platform.async_get_platforms(hass, "uponorx265"))
+    entities = len(hass.states.async_all())
+
+    started = time.perf_counter()
+    for _ in range(entries - 1):
+        await async_add_gateway_entry(hass, network, SimulatedGateway(), options)
+    following = (time.perf_counter() - started) / max(entries - 1, 1)
+
+    started = time.perf_counter()
+    for _ in range(repeats):
+        await hass.config_entries.async_reload(entry.entry_id)
+        await hass.async_block_till_done()
+    reload = (time.perf_counter() - started) / repeats
+
+    await hass.async_stop(force=True)
+    return {
+        "profile": profile,
+        "first_ms": round(first * 1000, 1),
+        "next_ms": round(following * 1000, 1) if entries > 1 else None,
+        "reload_ms": round(reload * 1000, 1),
+        "platforms": ",".join(platforms),
+        "entities": entities,
+    }
+
+
+def measure_setup(profile, entries, repeats):
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--setup-profile", profile,
+         "--entries", str(entries), "--repeats", str(repeats)],
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--entries", type=int, default=5, help="config entries set up per profile")
+    parser.add_argument("--repeats", type=int, default=5, help="interpreters for import timing and reloads per profile")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--setup-profile", choices=PROFILES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    if args.setup_profile:
+        # Child process of measure_setup
+        print(json.dumps(asyncio.run(async_measure_setup(args.setup_profile, args.entries, args.repeats))))
+        return
+
+    output = {
+        "import": measure_import(args.repeats),
+        "setup": [measure_setup(profile, args.entries, args.repeats) for profile in PROFILES],
+    }
+    if args.json:
+        print(json.dumps(output, indent=2))
+        return
+
+    print("import (cumulative ms, median):")
+    for module, ms in output["import"]["ms"].items():
+        print(f"  {module:<45} {ms}")
+    print("slowest dependencies pulled in:")
+    for module, ms in output["import"]["slowest_dependencies"].items():
+        print(f"  {module:<45} {ms}")
+    results = output["setup"]
+    columns = list(results[0])
+    widths = [max(len(column), *(len(str(result[column])) for result in results)) for column in columns]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for result in results:
+        print("  ".join(str(result[column]).ljust(width) for column, width in zip(columns, widths)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,34 @@
 import asyncio
 import math
 import logging
+import time
+from collections import Counter, deque
 
 import voluptuous as vol
 
-from homeassistant.core import HomeAssistant, SupportsResponse
+from homeassistant.core import HomeAssistant, SupportsResponse, callback
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.config_entries import ConfigEntry, ConfigEntryState
 from homeassistant.const import Platform
 
 from homeassistant.const import CONF_HOST, CONF_NAME, ATTR_DEVICE_ID
 from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.dispatcher import async_dispatcher_send
-from homeassistant.helpers.event import async_track_time_interval
-from homeassistant.helpers.storage import Store
+from homeassistant.helpers.storage import STORAGE_DIR, Store
 from homeassistant.helpers import device_registry, entity_registry
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
-from getmac import get_mac_address
-
 import homeassistant.util.dt as dt_util
 
 from .const import (
     DOMAIN,
     SIGNAL_UPONOR_STATE_UPDATE,
-    SCAN_INTERVAL,
+    SIGNAL_UPONOR_SNAPSHOT_DIFF,
+    SIGNAL_UPONOR_SITE_UPDATE,
     UNAVAILABLE_THRESHOLD,
     RELOAD_COOLDOWN,
+    SCAN_INTERVAL,
+    SET_VARIABLE_CONCURRENCY,
     STORAGE_KEY,
     STORAGE_VERSION,
     STATUS_OK,
@@ -38,6 +41,7 @@ from .const import (
     STATUS_ERROR_RF_SENSOR,
     STATUS_ERROR_TAMPER,
     STATUS_ERROR_TOO_HIGH_TEMP,
+    STATUS_STALE_READING,
     STATUS_ERROR_COMFAILOUT,
     STATUS_ERROR_CONTROLER,
     STATUS_ONLINE,
@@ -45,24 +49,83 @@ from .const import (
     STATUS_ERROR_MAINCONTROLER_FAIL,
     TOO_HIGH_TEMP_LIMIT,
     DEFAULT_TEMP,
-    DEVICE_MANUFACTURER
+    DEVICE_MANUFACTURER,
+    DEVICE_GATEWAY,
+    PRESET_MANUAL,
+    CONF_WRITE_QUEUE,
+    RUNTIME_SAVE_INTERVAL,
+    CONF_HISTORY_PERSIST,
+    CONF_STALE_READING,
+    DEFAULT_STALE_READING,
+    CONF_AGGREGATES,
+    CONF_BINARY_SENSOR_VALVE,
+    HISTORY_SIZE,
+)
+from .jnap import UponorJnap, UponorJnapRejected
+from .verification import UponorWriteVerifier
+from .scheduler import UponorPollScheduler
+from .stats import UponorPollStats
+from .runtime import UponorRuntimeTracker
+from .aggregates import UponorAggregates
+from .history import FIELDS as HISTORY_FIELDS, UponorSampleHistory
+from .websocket import async_setup_websocket_api
+from .metrics import async_setup_metrics_view
+from .helper import (
+    get_unique_id_from_config_entry,
+    thermostat_from_variable,
+    device_from_variable,
+    _get_mac,
+    _get_mac_with_arp_refresh,
 )
-from .jnap import UponorJnap
-from .helper import get_unique_id_from_config_entry, _get_mac_with_arp_refresh 
 
 from homeassistant.components.climate.const import (
+    HVACAction,
     PRESET_AWAY,
-    PRESET_COMFORT
+    PRESET_COMFORT,
+    PRESET_ECO,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS = [Platform.CLIMATE, Platform.SWITCH, Platform.SENSOR, Platform.BINARY_SENSOR]
 
-SET_VARIABLE_SCHEMA = vol.Schema(
+# Options that need the gateway connection set up again; all others are applied while loaded
+RELOAD_OPTIONS = {CONF_HOST}
+
+SET_VARIABLE_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Inclusive("var_name", "variable"): str,
+            vol.Inclusive("var_value", "variable"): vol.Any(str, int, float),
+            vol.Optional("variables"): {cv.string: vol.Any(str, int, float)},
+            vol.Optional(ATTR_DEVICE_ID): vol.All(cv.ensure_list, [cv.string]),
+        }
+    ),
+    cv.has_at_least_one_key("var_name", "variables"),
+)
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional("cycles", default=3): vol.All(vol.Coerce(int), vol.Range(min=1, max=20)),
+        vol.Optional("trace_memory", default=False): cv.boolean,
+        vol.Optional("top", default=25): vol.All(vol.Coerce(int), vol.Range(min=1, max=200)),
+        vol.Optional(ATTR_DEVICE_ID): vol.All(cv.ensure_list, [cv.string]),
+    }
+)
+
+GET_HISTORY_SCHEMA = vol.Schema(
     {
-        vol.Required("var_name"): str,
-        vol.Required("var_value"): vol.Any(str, int, float),
+        vol.Optional("thermostats"): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional("fields"): vol.All(cv.ensure_list, [vol.In(HISTORY_FIELDS)]),
+        vol.Optional("start"): cv.datetime,
+        vol.Optional("end"): cv.datetime,
+        vol.Optional(ATTR_DEVICE_ID): vol.All(cv.ensure_list, [cv.string]),
+    }
+)
+
+RECORD_TRAFFIC_SCHEMA = vol.Schema(
+    {
+        vol.Required("enable"): cv.boolean,
         vol.Optional(ATTR_DEVICE_ID): vol.All(cv.ensure_list, [cv.string]),
     }
 )
@@ -78,6 +141,32 @@ def _get_all_state_proxies(hass: HomeAssistant) -> dict:
     return proxies
 
 
+async def _async_elect_site_owner(hass: HomeAssistant):
+    """Give the sensors aggregating all gateways to the first loaded entry with
+    aggregates enabled; run whenever an entry is set up, unloaded or has its
+    aggregates option changed."""
+    proxies = list(_get_all_state_proxies(hass).values())
+    owner = next((proxy for proxy in proxies if proxy.is_aggregates_enabled()), None)
+    # The previous owner lets go first, so the new one takes over the registry entries
+    for proxy in sorted(proxies, key=lambda proxy: proxy is owner):
+        await proxy.async_set_site_owner(owner)
+    async_dispatcher_send(hass, SIGNAL_UPONOR_SITE_UPDATE)
+
+
+def _get_poll_scheduler(hass: HomeAssistant) -> UponorPollScheduler:
+    """Return the poll scheduler shared by every uponorx265 config entry."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if "scheduler" not in domain_data:
+        domain_data["scheduler"] = UponorPollScheduler(hass)
+    return domain_data["scheduler"]
+
+
+def _get_traffic_recorders(hass: HomeAssistant) -> dict:
+    """Traffic recorders started by record_traffic, by gateway unique_id. Kept
+    outside the entries so a reload (e.g. after an outage) records on."""
+    return hass.data.setdefault(DOMAIN, {}).setdefault("traffic_recorders", {})
+
+
 def _resolve_target_proxies(hass: HomeAssistant, call) -> list:
     """Resolve which gateway(s) a service call targets.
 
@@ -110,6 +199,36 @@ def _resolve_target_proxies(hass: HomeAssistant, call) -> list:
     return list(targeted.values())
 
 
+def _get_platforms(config_entry: ConfigEntry):
+    """Platforms that have entities with the entry's options."""
+    return [
+        platform for platform in PLATFORMS
+        if platform is not Platform.BINARY_SENSOR or config_entry.data.get(CONF_BINARY_SENSOR_VALVE, False)
+    ]
+
+
+async def async_migrate_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
+    """Migrate an entry created by an older version, once, before it is set up."""
+    _LOGGER.debug("Migrating config entry %s from version %s", config_entry.entry_id, config_entry.version)
+
+    if config_entry.version > 2:
+        # Created by a newer release; this one does not know its schema
+        _LOGGER.error(
+            "Cannot set up config entry %s of version %s after a downgrade", config_entry.entry_id, config_entry.version
+        )
+        return False
+
+    if config_entry.version == 1:
+        # Entity unique_ids from the pre-1.1.2 bare format to the prefixed format.
+        # Runs before platform setup so HA matches existing registry entries to
+        # the new unique_ids instead of creating duplicate entities.
+        _migrate_entity_unique_ids(hass, config_entry, get_unique_id_from_config_entry(config_entry))
+        hass.config_entries.async_update_entry(config_entry, version=2)
+        _LOGGER.info("Migrated config entry %s to version 2", config_entry.entry_id)
+
+    return True
+
+
 def _migrate_entity_unique_ids(hass: HomeAssistant, config_entry: ConfigEntry, unique_instance_id: str) -> None:
     
     ent_reg = entity_registry.async_get(hass)
@@ -147,13 +266,10 @@ def _migrate_entity_unique_ids(hass: HomeAssistant, config_entry: ConfigEntry, u
             )
 
 async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry):
-    # Sync options to data if they differ
+    # Sync options to data if they differ. Registry entries are kept: entities
+    # that are no longer created keep their customizations for when they return.
     if config_entry.options:
         if config_entry.data != config_entry.options:
-            dev_reg = device_registry.async_get(hass)
-            ent_reg = entity_registry.async_get(hass)
-            dev_reg.async_clear_config_entry(config_entry.entry_id)
-            ent_reg.async_clear_config_entry(config_entry.entry_id)
             hass.config_entries.async_update_entry(config_entry, data=config_entry.options)
 
     host = config_entry.data[CONF_HOST]
@@ -164,8 +280,12 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry):
     session = async_get_clientsession(hass)
 
     state_proxy = UponorStateProxy(hass, host, session, store, unique_id, config_entry)
+    state_proxy.set_traffic_recorder(_get_traffic_recorders(hass).get(unique_id))
     _LOGGER.debug(f"host {host} {config_entry} {unique_id}")
     await state_proxy.async_load_storage()
+    if config_entry.data.get(CONF_HISTORY_PERSIST, False):
+        path = state_proxy.get_history_path()
+        state_proxy.set_history(await hass.async_add_executor_job(UponorSampleHistory, HISTORY_SIZE, path))
 
     thermostats = state_proxy.get_cached_thermostats()
     if thermostats:
@@ -180,11 +300,21 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry):
     hass.data[unique_id] = {
         "state_proxy": state_proxy,
         "thermostats": thermostats,
+        "platforms": _get_platforms(config_entry),
+        # Undone in async_unload_entry, not with async_on_unload: Home Assistant
+        # also runs those callbacks when an options change unloads one platform
+        "unsubscribe": [],
     }
+    # The setup poll ran before the thermostats were known
+    state_proxy.update_aggregates()
+
+    async_setup_websocket_api(hass)
+    async_setup_metrics_view(hass)
 
     if not hass.services.has_service(DOMAIN, "set_variable"):
         hass.services.async_register(
-            DOMAIN, "set_variable", _create_set_variable_handler(hass), schema=SET_VARIABLE_SCHEMA
+            DOMAIN, "set_variable", _create_set_variable_handler(hass), schema=SET_VARIABLE_SCHEMA,
+            supports_response=SupportsResponse.OPTIONAL,
         )
 
     if not hass.services.has_service(DOMAIN, "dump_hardware_info"):
@@ -193,62 +323,154 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry):
             supports_response=SupportsResponse.ONLY,
         )
 
-    # Migrate entity unique_ids from pre-1.1.2 bare format to prefixed format.
-    # Must run before platform setup so HA matches existing registry entries
-    # to the new unique_ids instead of creating duplicate entities.
-    _migrate_entity_unique_ids(hass, config_entry, unique_id)
+    if not hass.services.has_service(DOMAIN, "record_traffic"):
+        hass.services.async_register(
+            DOMAIN, "record_traffic", _create_record_traffic_handler(hass), schema=RECORD_TRAFFIC_SCHEMA,
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+
+    if not hass.services.has_service(DOMAIN, "get_history"):
+        hass.services.async_register(
+            DOMAIN, "get_history", _create_get_history_handler(hass), schema=GET_HISTORY_SCHEMA,
+            supports_response=SupportsResponse.ONLY,
+        )
+
+    if not hass.services.has_service(DOMAIN, "profile"):
+        hass.services.async_register(
+            DOMAIN, "profile", _create_profile_handler(hass), schema=PROFILE_SCHEMA,
+            supports_response=SupportsResponse.ONLY,
+        )
 
-    # Forward setup for "climate" and "switch" platforms (done outside of the event loop)
-    await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
+    # Forward setup of the platforms this entry has entities on (done outside of the event loop)
+    await hass.config_entries.async_forward_entry_setups(config_entry, hass.data[unique_id]["platforms"])
+    await _async_elect_site_owner(hass)
 
-    # Track time interval for updates (use async function)
-    cancel_interval = async_track_time_interval(hass, state_proxy.async_update, SCAN_INTERVAL)
-    config_entry.async_on_unload(cancel_interval)
+    # Polls of all gateways are staggered by one shared scheduler
+    scheduler = _get_poll_scheduler(hass)
+    hass.data[unique_id]["unsubscribe"].append(scheduler.async_register(unique_id, state_proxy))
 
-    config_entry.async_on_unload(config_entry.add_update_listener(async_update_options))
+    hass.data[unique_id]["unsubscribe"].append(config_entry.add_update_listener(async_update_options))
 
     return True
 
 
 async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Update options."""
+    """Apply changed options to the loaded entry: each platform adds or removes only
+    the entities the options change. Removed entities lose their state but keep
+    their registry entries, so renames, names and areas survive turning them off."""
     _LOGGER.debug("Update setup entry: %s, data: %s, options: %s", entry.entry_id, entry.data, entry.options)
-    # Unload first to ensure clean state (if loaded), then reload
-    # This handles the case where setup may have failed initially
-    if entry.state in (ConfigEntryState.LOADED, ConfigEntryState.SETUP_RETRY):
-        await hass.config_entries.async_unload(entry.entry_id)
-    await hass.config_entries.async_reload(entry.entry_id)
+    if not entry.options or entry.data == entry.options:
+        # Nothing to apply; also the case when copying the options to data below calls back here
+        return
+
+    changed = {key for key in entry.data.keys() | entry.options.keys() if entry.data.get(key) != entry.options.get(key)}
+    entry_data = hass.data.get(get_unique_id_from_config_entry(entry))
+    if entry.state is not ConfigEntryState.LOADED or entry_data is None or changed & RELOAD_OPTIONS:
+        # Unload first to ensure clean state (if loaded), then reload
+        # This handles the case where setup may have failed initially
+        if entry.state in (ConfigEntryState.LOADED, ConfigEntryState.SETUP_RETRY):
+            await hass.config_entries.async_unload(entry.entry_id)
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+
+    hass.config_entries.async_update_entry(entry, data=dict(entry.options))
+    state_proxy = entry_data["state_proxy"]
+    platforms = _get_platforms(entry)
+    removed_platforms = [platform for platform in entry_data["platforms"] if platform not in platforms]
+    if removed_platforms:
+        for platform in removed_platforms:
+            entry_data["platforms"].remove(platform)
+            state_proxy.remove_platform(platform)
+        await hass.config_entries.async_unload_platforms(entry, removed_platforms)
+        # Unloading leaves the states behind as unavailable; the registry entries stay
+        registry = entity_registry.async_get(hass)
+        for registry_entry in entity_registry.async_entries_for_config_entry(registry, entry.entry_id):
+            if registry_entry.domain in removed_platforms:
+                hass.states.async_remove(registry_entry.entity_id)
+    added_platforms = [platform for platform in platforms if platform not in entry_data["platforms"]]
+    if added_platforms:
+        entry_data["platforms"].extend(added_platforms)
+        await hass.config_entries.async_forward_entry_setups(entry, added_platforms)
+    await state_proxy.async_apply_options(changed)
+    if CONF_AGGREGATES in changed:
+        await _async_elect_site_owner(hass)
 
 
 async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     _LOGGER.debug("Unloading setup entry: %s, data: %s, options: %s", config_entry.entry_id, config_entry.data, config_entry.options)
+    entry_data = hass.data.get(get_unique_id_from_config_entry(config_entry))
     unload_ok = await hass.config_entries.async_unload_platforms(
-        config_entry, PLATFORMS
+        config_entry, entry_data["platforms"] if entry_data else _get_platforms(config_entry)
     )
-    if unload_ok:
+    if unload_ok and entry_data is not None:
         hass.data.pop(get_unique_id_from_config_entry(config_entry), None)
+        for unsubscribe in entry_data["unsubscribe"]:
+            unsubscribe()
+        await entry_data["state_proxy"].async_save_storage()
+        await entry_data["state_proxy"].async_close_history()
+        # Flushed here; a recording still in _get_traffic_recorders continues when set up again
+        recorder = entry_data["state_proxy"].get_traffic_recorder()
+        if recorder is not None:
+            entry_data["state_proxy"].set_traffic_recorder(None)
+            await recorder.async_close()
+        await _async_elect_site_owner(hass)
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> None:
+    """Forget the traffic recording of a removed entry; unloading already closed it."""
+    _get_traffic_recorders(hass).pop(get_unique_id_from_config_entry(config_entry), None)
+
+
 def _create_set_variable_handler(hass: HomeAssistant):
     """Build the uponorx265.set_variable service handler bound to this hass instance.
 
     Supports multiple gateways: pass 'device_id' (any device belonging to the
     target gateway) to disambiguate when more than one gateway is configured.
+    All variables of a call are sent to each gateway in one SetAttributes
+    request, and the targeted gateways are written concurrently.
     """
-    async def handle_set_variable(call) -> None:
-        var_name = call.data.get('var_name')
-        var_value = call.data.get('var_value')
-        if not var_name:
-            return
+    async def handle_set_variable(call) -> dict:
+        variables = dict(call.data.get('variables', {}))
+        if call.data.get('var_name'):
+            variables[call.data['var_name']] = call.data['var_value']
+        if not variables:
+            return {"gateways": []}
 
         proxies = _resolve_target_proxies(hass, call)
         if not proxies:
-            return
-
-        for proxy in proxies:
-            await proxy.async_set_variable(var_name, var_value)
+            return {"gateways": []}
+
+        semaphore = asyncio.Semaphore(SET_VARIABLE_CONCURRENCY)
+
+        async def _set_on_gateway(proxy) -> dict:
+            async with semaphore:
+                started = time.monotonic()
+                try:
+                    statuses = await proxy.async_set_variables(variables)
+                    error = None
+                except Exception as ex:  # pylint: disable=broad-except
+                    statuses = {var: "error" for var in variables}
+                    error = str(ex)
+                return {
+                    "gateway": proxy.get_integration_name(),
+                    "gateway_id": proxy.get_gateway_id(),
+                    "status": "error" if error else "ok",
+                    "error": error,
+                    "latency_ms": round((time.monotonic() - started) * 1000, 1),
+                    "variables": statuses,
+                }
+
+        results = await asyncio.gather(*(_set_on_gateway(proxy) for proxy in proxies))
+
+        failed = [result for result in results if result["error"]]
+        if failed and not call.return_response:
+            raise HomeAssistantError(
+                "set_variable failed on "
+                + ", ".join(f"{result['gateway']}: {result['error']}" for result in failed)
+            )
+        return {"gateways": list(results)}
 
     return handle_set_variable
 
@@ -310,15 +532,130 @@ def _create_dump_hardware_handler(hass: HomeAssistant):
     return handle_dump_hardware_info
 
 
+def _create_profile_handler(hass: HomeAssistant):
+    """Build the uponorx265.profile service handler.
+
+    Runs cProfile (and optionally tracemalloc) across the next poll and
+    dispatch cycles of the targeted gateways, or of all gateways when no
+    'device_id' is given, and returns the hottest functions and allocation
+    sites as a service response.
+    """
+    async def handle_profile(call) -> dict:
+        # Imported here so cProfile/tracemalloc are only loaded when profiling
+        from .profiling import UponorProfiler
+
+        if call.data.get(ATTR_DEVICE_ID):
+            proxies = _resolve_target_proxies(hass, call)
+        else:
+            proxies = list(_get_all_state_proxies(hass).values())
+        if not proxies:
+            raise HomeAssistantError("No Uponor gateway to profile")
+
+        domain_data = hass.data.setdefault(DOMAIN, {})
+        if domain_data.get("profiler") is not None:
+            raise HomeAssistantError("An Uponor profiling run is already in progress")
+
+        cycles = call.data["cycles"]
+        profiler = UponorProfiler([proxy.get_unique_id() for proxy in proxies], cycles, call.data["trace_memory"])
+        domain_data["profiler"] = profiler
+        profiler.start()
+        for proxy in proxies:
+            proxy.set_profiler(profiler)
+        try:
+            await profiler.async_wait(cycles * SCAN_INTERVAL.total_seconds() * 2 + 30)
+            return profiler.report(call.data["top"])
+        finally:
+            # Also when the call is cancelled or the report fails
+            for proxy in proxies:
+                proxy.set_profiler(None)
+            domain_data["profiler"] = None
+            profiler.stop()
+
+    return handle_profile
+
+
+def _create_get_history_handler(hass: HomeAssistant):
+    """Build the uponorx265.get_history service handler.
+
+    Returns the samples kept in memory for each thermostat of the targeted
+    gateways (all gateways without 'device_id') as columns: one list of
+    epoch seconds under 'time' and one list of values per field.
+    """
+    async def handle_get_history(call) -> dict:
+        if call.data.get(ATTR_DEVICE_ID):
+            proxies = _resolve_target_proxies(hass, call)
+        else:
+            proxies = list(_get_all_state_proxies(hass).values())
+        start = dt_util.as_timestamp(call.data["start"]) if "start" in call.data else None
+        end = dt_util.as_timestamp(call.data["end"]) if "end" in call.data else None
+        fields = call.data.get("fields")
+
+        result = {"gateways": []}
+        for proxy in proxies:
+            thermostats = call.data.get("thermostats") or hass.data.get(proxy.get_unique_id(), {}).get("thermostats", [])
+            history = {}
+            for thermostat in thermostats:
+                columns = proxy.get_history(thermostat, start, end)
+                if fields:
+                    columns = {key: value for key, value in columns.items() if key == "time" or key in fields}
+                history[thermostat] = columns
+            result["gateways"].append({
+                "gateway": proxy.get_integration_name(),
+                "gateway_id": proxy.get_gateway_id(),
+                "thermostats": history,
+            })
+        return result
+
+    return handle_get_history
+
+
+def _create_record_traffic_handler(hass: HomeAssistant):
+    """Build the uponorx265.record_traffic service handler.
+
+    Starts or stops logging the raw JNAP exchanges of a gateway to
+    <config>/uponorx265_traffic_<unique_id>.jsonl, for replay with
+    traffic.UponorReplayJnap. A recording lasts until it is stopped, also
+    across reloads of the gateway's entry.
+    """
+    async def handle_record_traffic(call) -> dict:
+        from .traffic import UponorTrafficRecorder
+
+        proxies = _resolve_target_proxies(hass, call)
+        recorders = _get_traffic_recorders(hass)
+        result = {"gateways": []}
+        for proxy in proxies:
+            recorder = proxy.get_traffic_recorder()
+            if call.data["enable"] and recorder is None:
+                path = hass.config.path(f"{DOMAIN}_traffic_{proxy.get_unique_id()}.jsonl")
+                recorder = UponorTrafficRecorder(hass, path, proxy.get_host())
+                recorders[proxy.get_unique_id()] = recorder
+                proxy.set_traffic_recorder(recorder)
+            elif not call.data["enable"] and recorder is not None:
+                recorders.pop(proxy.get_unique_id(), None)
+                proxy.set_traffic_recorder(None)
+                await recorder.async_close()
+            result["gateways"].append({
+                "gateway": proxy.get_integration_name(),
+                "recording": proxy.get_traffic_recorder() is not None,
+                "path": recorder.path if recorder is not None else None,
+                "records": recorder.records if recorder is not None else 0,
+            })
+        return result
+
+    return handle_record_traffic
+
+
 class UponorStateProxy:
-    def __init__(self, hass, host, session, store, unique_id, config_entry):
+    def __init__(self, hass, host, session, store, unique_id, config_entry, client=None):
         self._hass = hass
-        self._client = UponorJnap(host, session)
+        # A stand-in client (e.g. traffic.UponorReplayJnap) can replace the gateway
+        self._client = client if client is not None else UponorJnap(host, session)
         self._store = store
         self._host = host
         self._data = {}
         self._storage_data = {}
         self._storage_metadata = {}
+        self._pending_writes = {}
         self.next_sp_from_dt = None
         self._unique_id = unique_id
         self._config_entry = config_entry
@@ -328,6 +665,28 @@ class UponorStateProxy:
         self._reload_in_progress = False
         self._last_reload_attempt = None
         self._gateway_id = None
+        self._verifier = UponorWriteVerifier(hass, unique_id, self.get_integration_name())
+        self._stats = UponorPollStats()
+        self._dispatch_counts = Counter()
+        self._reload_history = deque(maxlen=20)
+        self._profiler = None
+        self._full_broadcast = False
+        self._device_info = {}
+        self._runtime = UponorRuntimeTracker()
+        self._runtime_saved_at = time.monotonic()
+        self._history = UponorSampleHistory()
+        # var -> epoch seconds of the poll that first saw its current value
+        self._last_changed = {}
+        self._stale_readings = set()
+        self._aggregates = UponorAggregates()
+        # Per platform, a callback creating and adding the entities of newly paired thermostats
+        self._entity_factories = {}
+        # Callbacks of platforms that apply changed options to their live entities
+        self._options_listeners = {}
+        self._site_owner = False
+        self._site_owner_listener = None
+        # Last snapshot sent to websocket subscribers, None while nobody subscribes
+        self._snapshot = None
         _LOGGER.debug(f"Configdata = {self._config_entry}")
     # Controlers config  
     def get_active_controllers(self):
@@ -366,7 +725,7 @@ class UponorStateProxy:
             sn = controller_id[:4]
             prodk = sn[:3]
             mod = sn[-1:]
-            _LOGGER.debug(f"id {hwid} s/n start {sn}")            
+            _LOGGER.debug("id %s s/n start %s", hwid, sn)
             if prodk=="419":
                 if mod=="5":
 # Smartix Base Pulse
@@ -401,7 +760,8 @@ class UponorStateProxy:
     async def async_resolve_gateway_id(self) -> str:
         """Resolve gateway MAC via ARP (with UDP socket to prime ARP cache) and cache it."""
         if self._gateway_id is None:
-            mac = get_mac_address(ip=self._host)
+            # In the executor: the first lookup imports getmac and reads the ARP cache
+            mac = await self._hass.async_add_executor_job(_get_mac, self._host)
             if mac is not None:
                 self._gateway_id = mac.replace(':', '')
             else:
@@ -418,6 +778,132 @@ class UponorStateProxy:
                     self._gateway_id = self._host.replace('.', '')
         return self._gateway_id
 
+    # -------------------------------------------------------------------------
+    # Device metadata
+    # -------------------------------------------------------------------------
+
+    def get_device_info(self, device):
+        """Device registry info for a thermostat ('C1_T1'), controller ('C1') or
+        DEVICE_GATEWAY, built once and kept until its firmware/topology variables change."""
+        info = self._device_info.get(device)
+        if info is None:
+            info = self._device_info[device] = self._build_device_info(device)
+        return info
+
+    def _build_device_info(self, device):
+        if device == DEVICE_GATEWAY:
+            gateway_id = self.get_gateway_id()
+            return {
+                "identifiers": {(self._unique_id, gateway_id)},
+                "name": self.get_integration_name(),
+                "manufacturer": DEVICE_MANUFACTURER,
+                "model": self.get_model(),
+                "serial_number": gateway_id,
+            }
+        if "_T" in device:
+            thermostat_id = self.get_thermostat_id(device)
+            return {
+                "identifiers": {(self._unique_id, thermostat_id)},
+                "name": self.get_room_name(device),
+                "manufacturer": DEVICE_MANUFACTURER,
+                "model": self.get_thermostat_model(device),
+                "sw_version": self.get_version(device),
+                "serial_number": thermostat_id,
+                "via_device": (self._unique_id, self.get_controller_id(device.split('_')[0])),
+            }
+        controller_id = self.get_controller_id(device)
+        return {
+            "identifiers": {(self._unique_id, controller_id)},
+            "name": self.get_controller_name(device),
+            "manufacturer": DEVICE_MANUFACTURER,
+            "model": self.get_controller_hardware(device),
+            "sw_version": self.get_controller_version(device),
+            "serial_number": controller_id,
+            "via_device": (self._unique_id, self.get_gateway_id()),
+        }
+
+    def invalidate_device_info(self, changed=None):
+        """Drop cached device info affected by the `changed` variables (everything
+        when None) and return the dropped entries."""
+        if changed is None:
+            devices = {DEVICE_GATEWAY}
+        else:
+            devices = {device for var in changed if (device := device_from_variable(var)) is not None}
+        if not devices or not self._device_info:
+            return {}
+        if DEVICE_GATEWAY in devices:
+            dropped, self._device_info = self._device_info, {}
+            return dropped
+        # A controller's id is also the via_device of its thermostats
+        return {
+            device: self._device_info.pop(device)
+            for device in list(self._device_info)
+            if device in devices or device.split('_')[0] in devices
+        }
+
+    @callback
+    def _async_update_device_registry(self, dropped):
+        """Push rebuilt device info to the device registry where it actually changed."""
+        dev_reg = device_registry.async_get(self._hass)
+        for device, old_info in dropped.items():
+            new_info = self.get_device_info(device)
+            changes = {
+                field: new_info.get(field)
+                for field in ("name", "model", "sw_version", "serial_number")
+                if new_info.get(field) != old_info.get(field)
+            }
+            if not changes:
+                continue
+            entry = dev_reg.async_get_device(identifiers=old_info["identifiers"])
+            if entry is None:
+                continue
+            if new_info["identifiers"] != old_info["identifiers"]:
+                changes["new_identifiers"] = new_info["identifiers"]
+            _LOGGER.debug("Updating device %s: %s", device, changes)
+            dev_reg.async_update_device(entry.id, **{
+                key: str(value) if key == "model" and value is not None else value
+                for key, value in changes.items()
+            })
+
+    def get_poll_stats(self):
+        return self._stats
+
+    def get_raw_data(self):
+        return dict(self._data)
+
+    def get_variable(self, var):
+        return self._data.get(var)
+
+    def get_thermostats(self):
+        return self._hass.data.get(self._unique_id, {}).get("thermostats", [])
+
+    def get_storage_metadata(self):
+        return dict(self._storage_metadata)
+
+    def record_dispatch(self, entity_id):
+        self._dispatch_counts[entity_id] += 1
+
+    def get_dispatch_counts(self):
+        return dict(self._dispatch_counts)
+
+    def get_client_error_history(self):
+        return list(self._client.error_history)
+
+    def get_availability_state(self):
+        """Unavailability and reload bookkeeping that guards the automatic reload."""
+        return {
+            "available": self.is_available(),
+            "last_successful_update": self._last_successful_update.isoformat() if self._last_successful_update else None,
+            "unavailable_since": self._unavailable_since.isoformat() if self._unavailable_since else None,
+            "reload_in_progress": self._reload_in_progress,
+            "last_reload_attempt": self._last_reload_attempt.isoformat() if self._last_reload_attempt else None,
+            "reload_history": list(self._reload_history),
+        }
+
+    def get_poll_window(self, name):
+        """Rolling window of one per-poll measurement of UponorPollStats."""
+        return getattr(self._stats, name, None)
+
     def get_gateway_status(self):
         if self.is_available() is None:
             return STATUS_OFFLINE
@@ -448,9 +934,9 @@ class UponorStateProxy:
     async def async_iset_inavg(self, thermostat, override):
         var = thermostat.replace('_T', '_channel_') + '_ave_temp'
         data = "1" if override else "0"
-        await self._client.send_data({var: data})
+        await self._async_send_data({var: data})
         self._data[var] = data
-        self._hass.async_create_task(self.call_state_update())        
+        self.call_state_update([var])
 
     def _get_room_name_from_data(self, thermostat):
         var = 'cust_' + thermostat + '_name'
@@ -464,8 +950,16 @@ class UponorStateProxy:
         payload = dict(self._storage_data)
         if self._storage_metadata:
             payload["_meta"] = self._storage_metadata
+        if self._pending_writes:
+            payload["_pending_writes"] = self._pending_writes
+        runtime = self._runtime.as_dict()
+        if runtime:
+            payload["_runtime"] = runtime
         return payload
 
+    async def async_save_storage(self):
+        await self._store.async_save(self._compose_storage_payload())
+
     # -------------------------------------------------------------------------
     # Storage
     # -------------------------------------------------------------------------
@@ -475,16 +969,21 @@ class UponorStateProxy:
         if not isinstance(data, dict):
             self._storage_data = {}
             self._storage_metadata = {}
+            self._pending_writes = {}
             return
 
         self._storage_metadata = data.get("_meta", {}) if isinstance(data.get("_meta", {}), dict) else {}
-        self._storage_data = {key: value for key, value in data.items() if key != "_meta"}
+        self._pending_writes = data.get("_pending_writes", {}) if isinstance(data.get("_pending_writes", {}), dict) else {}
+        self._storage_data = {key: value for key, value in data.items() if key not in ("_meta", "_pending_writes", "_runtime")}
+        if isinstance(data.get("_runtime"), dict) and not self._runtime.as_dict():
+            self._runtime.load(data["_runtime"])
       
     def get_cached_thermostats(self):
         thermostats = self._storage_metadata.get("thermostats", [])
         ids = self._storage_metadata.get("ids", {})
         if isinstance(thermostats, list) and thermostats and all(ids.get(thermostat) for thermostat in thermostats):
-            return thermostats
+            # A copy: the entry's thermostat list changes as thermostats are paired and removed
+            return list(thermostats)
         return []
 
     def is_available(self):
@@ -563,6 +1062,100 @@ class UponorStateProxy:
             self._storage_metadata = new_metadata
             await self._store.async_save(self._compose_storage_payload())
 
+    # -------------------------------------------------------------------------
+    # Offline write queue
+    # -------------------------------------------------------------------------
+
+    def is_write_queue_enabled(self):
+        return self._config_entry.data.get(CONF_WRITE_QUEUE, False)
+
+    def get_pending_writes(self):
+        return dict(self._pending_writes)
+
+    def get_unverified_writes(self):
+        return self._verifier.get_pending()
+
+    async def _async_send_data(self, data):
+        """Send variables to the gateway, queueing them while it is unreachable.
+
+        A write the gateway rejects is never queued; the error goes to the caller.
+        """
+        if not self.is_write_queue_enabled():
+            await self._client.send_data(data)
+            self._verifier.track(data)
+            return
+
+        if not self.is_available():
+            await self._async_queue_writes(data)
+            return
+
+        try:
+            await self._client.send_data(data)
+        except HomeAssistantError as ex:
+            _LOGGER.warning("Gateway %s unreachable, queueing %s: %s", self._host, list(data), ex)
+            await self._async_queue_writes(data)
+            return
+        self._verifier.track(data)
+
+        # Queued values of these variables are older than the ones just written
+        if any(var in self._pending_writes for var in data):
+            for var in data:
+                self._pending_writes.pop(var, None)
+            await self._store.async_save(self._compose_storage_payload())
+
+    async def _async_queue_writes(self, data):
+        self._pending_writes.update(data)
+        await self._store.async_save(self._compose_storage_payload())
+
+    async def _async_flush_pending_writes(self):
+        pending = dict(self._pending_writes)
+        try:
+            await self._client.send_data(pending)
+            sent, rejected = pending, {}
+        except UponorJnapRejected:
+            # The gateway refuses the whole batch for one bad variable, so find
+            # it by writing them one at a time.
+            sent, rejected = await self._async_flush_individually(pending)
+        except Exception as ex:
+            _LOGGER.warning("Unable to flush %d queued Uponor writes: %s", len(pending), ex)
+            return
+
+        _LOGGER.debug("Flushed %d queued Uponor writes, %d rejected", len(sent), len(rejected))
+        # The polled values stay in _data until a later poll confirms these
+        self._verifier.track(sent)
+        for var, value in {**sent, **rejected}.items():
+            if self._pending_writes.get(var) == value:
+                del self._pending_writes[var]
+        await self._store.async_save(self._compose_storage_payload())
+
+    async def _async_flush_individually(self, pending):
+        """Write queued variables one by one. Returns (sent, rejected); the rest
+        stay queued when the gateway becomes unreachable halfway."""
+        sent, rejected = {}, {}
+        for var, value in pending.items():
+            try:
+                await self._client.send_data({var: value})
+            except UponorJnapRejected as ex:
+                self._verifier.reject({var: value}, ex)
+                rejected[var] = value
+                continue
+            except Exception as ex:
+                _LOGGER.warning("Unable to flush queued Uponor write %s: %s", var, ex)
+                break
+            sent[var] = value
+        return sent, rejected
+
+    async def _async_retry_unapplied_writes(self, poll_started):
+        retry = self._verifier.verify(self._data, poll_started)
+        if not retry:
+            return
+        try:
+            await self._client.send_data(retry)
+        except Exception as ex:
+            _LOGGER.warning("Unable to resend %d Uponor writes: %s", len(retry), ex)
+            return
+        self._verifier.track(retry)
+
     # -------------------------------------------------------------------------
     # Thermostat config
     # -------------------------------------------------------------------------
@@ -613,7 +1206,13 @@ class UponorStateProxy:
                     return ('T-144')
                 if mod=="2":
                     return ('T-145')
-            _LOGGER.debug(f"id {hwid} s/n start {sn} rh_c {self.has_humidity_control(thermostat)} rh_s {self.has_humidity_sensor(thermostat)} pd {self.is_public_device(thermostat)} hft {self.has_floor_temperature(thermostat)} Sensor only {self.is_sensor_only(thermostat)}")
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug(
+                    "id %s s/n start %s rh_c %s rh_s %s pd %s hft %s Sensor only %s",
+                    hwid, sn, self.has_humidity_control(thermostat), self.has_humidity_sensor(thermostat),
+                    self.is_public_device(thermostat), self.has_floor_temperature(thermostat),
+                    self.is_sensor_only(thermostat),
+                )
 # Smartix Base Pulse                   
 #                   return("T-141") #No temp adjustment/RH
 #                   return("T-143") #No temp adjustment/External temp/Tamper Alarm
@@ -630,7 +1229,8 @@ class UponorStateProxy:
 #                   return("T-168") #Digital display/External temp/RH/TimeDate
 #                   return("T-169") #Digital display/External temp/RH
 #                    return("T-247")
-        return hwid
+            return hwid
+        return None
 
     def get_model(self):
         return "R-208"
@@ -750,14 +1350,11 @@ class UponorStateProxy:
     async def async_local_override(self, thermostat, override):
         var = thermostat + '_pub_setpoint_override'
         data = "1" if override else "0"
-        await self._client.send_data({var: data})
+        await self._async_send_data({var: data})
         self._data[var] = data
-        if not override:
-            # Re-poll immediately so HA displays the setpoint the physical dial has set,
-            # rather than the last HA-set value.
-            self._hass.async_create_task(self.async_update())
-        else:
-            self._hass.async_create_task(self.call_state_update())
+        # When the override is released, the next regular poll both confirms the
+        # write and picks up the setpoint the physical dial has set.
+        self.call_state_update([var])
 
     # -------------------------------------------------------------------------
     # State
@@ -773,6 +1370,111 @@ class UponorStateProxy:
         if var in self._data:
             return int(self._data[var])
 
+    def get_runtime(self, device):
+        """Seconds the actuator of a thermostat ('C1_T1') or any actuator of a controller ('C1') was on."""
+        return self._runtime.get(device).runtime
+
+    def get_duty_cycle(self, device):
+        return self._runtime.get(device).duty_cycle(time.time())
+
+    def get_pwm_average(self, device):
+        return self._runtime.get(device).pwm_average(time.time())
+
+    def _update_runtime(self):
+        sample = {}
+        controllers = {}
+        for thermostat in self._hass.data.get(self._unique_id, {}).get("thermostats", ()):
+            active = bool(self.is_active(thermostat))
+            pwm = self.get_pwm(thermostat)
+            sample[thermostat] = (active, pwm)
+            controllers.setdefault(thermostat.split('_')[0], []).append((active, pwm))
+        for controller, states in controllers.items():
+            pwms = [pwm for _, pwm in states if pwm is not None]
+            sample[controller] = (
+                any(active for active, _ in states),
+                sum(pwms) / len(pwms) if pwms else None,
+            )
+        self._runtime.update(sample, time.time())
+
+        # A delayed save is always pending, due RUNTIME_SAVE_INTERVAL after the previous
+        # one, so the Store also writes the accumulators when Home Assistant stops
+        interval = RUNTIME_SAVE_INTERVAL.total_seconds()
+        now = time.monotonic()
+        if now - self._runtime_saved_at >= interval:
+            self._runtime_saved_at = now
+        self._store.async_delay_save(self._compose_storage_payload, self._runtime_saved_at + interval - now)
+
+    def set_history(self, history):
+        self._history = history
+
+    def get_history_path(self):
+        return self._hass.config.path(STORAGE_DIR, f"{DOMAIN}_history_{self._unique_id}.bin")
+
+    async def async_close_history(self):
+        await self._hass.async_add_executor_job(self._history.close)
+
+    async def async_apply_options(self, changed):
+        """Apply changed options that need more than reading the entry data again."""
+        if CONF_HISTORY_PERSIST in changed:
+            await self.async_close_history()
+            if self._config_entry.data.get(CONF_HISTORY_PERSIST, False):
+                self.set_history(await self._hass.async_add_executor_job(
+                    UponorSampleHistory, HISTORY_SIZE, self.get_history_path()
+                ))
+            else:
+                self.set_history(UponorSampleHistory())
+        if CONF_AGGREGATES in changed:
+            self.update_aggregates()
+        # Configured room and controller names
+        dropped = self.invalidate_device_info()
+        if dropped:
+            self._async_update_device_registry(dropped)
+        for listener in self._options_listeners.values():
+            listener(self._config_entry.data)
+        self.call_state_update()
+
+    def get_history(self, thermostat, start=None, end=None):
+        return self._history.query(thermostat, start, end)
+
+    def _record_history(self):
+        now = time.time()
+        for thermostat in self._hass.data.get(self._unique_id, {}).get("thermostats", ()):
+            self._history.record(
+                thermostat, now,
+                self.get_temperature(thermostat),
+                self.get_floor_temperature(thermostat),
+                self.get_setpoint(thermostat),
+                self.get_humidity(thermostat),
+                self.get_pwm(thermostat),
+                self.is_active(thermostat),
+            )
+
+    def is_on(self, thermostat):
+        """False when the setpoint sits at the limit the integration uses for 'off'."""
+        temp_raw = self.get_setpoint_raw(thermostat)
+        is_cool = self.is_cool_enabled()
+        min_temp = self.get_min_limit(thermostat)
+        max_temp = self.get_max_limit(thermostat)
+        if temp_raw is None or is_cool is None or min_temp is None or max_temp is None:
+            return True
+        return not ((is_cool and temp_raw >= max_temp) or (not is_cool and temp_raw <= min_temp))
+
+    def get_preset_mode(self, thermostat):
+        if self.get_local_override(thermostat):
+            return PRESET_MANUAL
+        if self.is_eco(thermostat):
+            return PRESET_ECO
+        if self.is_away():
+            return PRESET_AWAY
+        return PRESET_COMFORT
+
+    def get_hvac_action(self, thermostat):
+        if not self.is_on(thermostat):
+            return HVACAction.OFF
+        if self.is_active(thermostat):
+            return HVACAction.COOLING if self.is_cool_enabled() else HVACAction.HEATING
+        return HVACAction.IDLE
+
     def get_status(self, thermostat):
         var = thermostat + '_stat_battery_error'
         if var in self._data and self._data[var] == "1":
@@ -798,9 +1500,175 @@ class UponorStateProxy:
         var = thermostat + '_room_temperature'
         if var in self._data and int(self._data[var]) > TOO_HIGH_TEMP_LIMIT:
             return STATUS_ERROR_TOO_HIGH_TEMP
+        if thermostat in self._stale_readings:
+            return STATUS_STALE_READING
 
         return STATUS_OK
 
+    # -------------------------------------------------------------------------
+    # Thermostats paired or removed while running
+    # -------------------------------------------------------------------------
+
+    def add_entity_factory(self, platform, factory):
+        """Register a platform callback taking a list of thermostats and adding their entities."""
+        self._entity_factories[platform] = factory
+
+    def add_options_listener(self, platform, listener):
+        """Register a platform callback taking the entry data after an options change."""
+        self._options_listeners[platform] = listener
+
+    def remove_platform(self, platform):
+        """Forget the callbacks of a platform that is being unloaded."""
+        self._entity_factories.pop(platform, None)
+        self._options_listeners.pop(platform, None)
+
+    def _is_unpaired(self, thermostat):
+        """True only when the gateway explicitly reports the thermostat or its controller absent;
+        a variable missing from one response is not enough."""
+        controller, number = thermostat.split('_T')
+        return (
+            self._data.get('sys_controller_' + controller[1:] + '_presence') == "0"
+            or self._data.get(controller + '_thermostat_' + number + '_presence') == "0"
+        )
+
+    async def _async_sync_thermostats(self):
+        """Add the entities of thermostats that were paired and remove the devices
+        of thermostats that were removed, leaving every other entity alone."""
+        entry_data = self._hass.data.get(self._unique_id, {})
+        if entry_data.get("thermostats") is None:
+            return
+        # Changed as a copy, so the stored discovery metadata is only updated below
+        known = list(entry_data["thermostats"])
+        added = [thermostat for thermostat in self.get_active_thermostats() if thermostat not in known]
+        removed = [thermostat for thermostat in known if self._is_unpaired(thermostat)]
+        if not added and not removed:
+            return
+
+        if removed:
+            _LOGGER.info("Thermostats removed from gateway %s: %s", self._host, removed)
+            dev_reg = device_registry.async_get(self._hass)
+            for thermostat in removed:
+                known.remove(thermostat)
+                self._aggregates.remove(thermostat)
+                self._stale_readings.discard(thermostat)
+                # Their runtime and samples would otherwise stay in storage and diagnostics
+                self._runtime.remove(thermostat)
+                self._history.remove(thermostat)
+                self._storage_data.pop(thermostat, None)
+                device = dev_reg.async_get_device(identifiers=self.get_device_info(thermostat)["identifiers"])
+                self._device_info.pop(thermostat, None)
+                if device is not None:
+                    # Removes the thermostat's entities together with the device
+                    dev_reg.async_update_device(device.id, remove_config_entry_id=self._config_entry.entry_id)
+            # Discovery metadata keeps thermostats missing from one response; forget these for good
+            for key in ("thermostats", "humidity", "floor"):
+                if key in self._storage_metadata:
+                    self._storage_metadata[key] = [t for t in self._storage_metadata[key] if t not in removed]
+            for key in ("ids", "rooms"):
+                if key in self._storage_metadata:
+                    self._storage_metadata[key] = {
+                        t: value for t, value in self._storage_metadata[key].items() if t not in removed
+                    }
+
+        if added:
+            _LOGGER.info("Thermostats paired to gateway %s: %s", self._host, added)
+            known.extend(added)
+        entry_data["thermostats"] = known
+        if removed:
+            await self._store.async_save(self._compose_storage_payload())
+        if added:
+            for factory in self._entity_factories.values():
+                factory(added)
+
+    # -------------------------------------------------------------------------
+    # Aggregates
+    # -------------------------------------------------------------------------
+
+    def is_aggregates_enabled(self):
+        return self._config_entry.data.get(CONF_AGGREGATES, False)
+
+    def get_aggregate(self, group):
+        """Aggregates of a controller ('C1') or of the whole gateway (DEVICE_GATEWAY)."""
+        return self._aggregates.get(group)
+
+    @callback
+    def update_aggregates(self, changed=None):
+        """Fold the thermostats named by `changed` (all when None) into the aggregates."""
+        if not self.is_aggregates_enabled():
+            return
+        thermostats = self.get_thermostats()
+        if changed is not None:
+            targets = {thermostat for var in changed if (thermostat := thermostat_from_variable(var)) is not None}
+            thermostats = [thermostat for thermostat in thermostats if thermostat in targets]
+        self._aggregates.update({
+            thermostat: (self.get_temperature(thermostat), self.is_active(thermostat), self.get_pwm(thermostat))
+            for thermostat in thermostats
+        })
+
+    def is_site_owner(self):
+        """True when this entry has the sensors aggregating all gateways."""
+        return self._site_owner
+
+    def set_site_owner_listener(self, listener):
+        """Register the sensor platform's coroutine adding or removing the site
+        sensors; it takes the proxy of the elected owner (None without one)."""
+        self._site_owner_listener = listener
+
+    async def async_set_site_owner(self, owner):
+        self._site_owner = owner is self
+        if self._site_owner_listener is not None:
+            await self._site_owner_listener(owner)
+
+    # -------------------------------------------------------------------------
+    # Reading freshness
+    # -------------------------------------------------------------------------
+
+    def get_last_changed(self, var):
+        """When the gateway first reported the current value of `var` (since startup)."""
+        changed_at = self._last_changed.get(var)
+        return dt_util.utc_from_timestamp(changed_at) if changed_at is not None else None
+
+    def get_last_reading(self, thermostat):
+        return self.get_last_changed(thermostat + '_room_temperature')
+
+    def is_reading_stale(self, thermostat):
+        return thermostat in self._stale_readings
+
+    def is_rf_thermostat(self, thermostat):
+        """False for thermostats detected as wired Smatrix Base models (T-14x);
+        any other thermostat may be a battery powered RF one."""
+        model = self.get_thermostat_model(thermostat)
+        return not (isinstance(model, str) and model.startswith("T-14"))
+
+    def _update_last_changed(self, changed, now):
+        """Stamp the changed variables and return the thermostats whose room
+        temperature went stale or fresh again in this poll.
+
+        An RF thermostat is stale when its room temperature has not changed for
+        the configured number of minutes while the gateway reports no RF error,
+        which usually means a dead battery. Off unless a number of minutes is set.
+        """
+        for var in changed:
+            self._last_changed[var] = now
+        threshold = self._config_entry.data.get(CONF_STALE_READING, DEFAULT_STALE_READING) * 60
+        flipped = []
+        for thermostat in self.get_thermostats():
+            changed_at = self._last_changed.get(thermostat + '_room_temperature')
+            stale = (
+                threshold > 0
+                and changed_at is not None
+                and self.is_rf_thermostat(thermostat)
+                and now - changed_at > threshold
+                and self._data.get(thermostat + '_stat_rf_error') != "1"
+            )
+            if stale != (thermostat in self._stale_readings):
+                if stale:
+                    self._stale_readings.add(thermostat)
+                else:
+                    self._stale_readings.discard(thermostat)
+                flipped.append(thermostat)
+        return flipped
+
     # -------------------------------------------------------------------------
     # HVAC modes
     # -------------------------------------------------------------------------
@@ -809,17 +1677,17 @@ class UponorStateProxy:
         for thermostat in self._hass.data[self._unique_id]['thermostats']:
             if self.get_setpoint(thermostat) == self.get_min_limit(thermostat):
                 await self.async_set_setpoint(thermostat, self.get_max_limit(thermostat))
-        await self._client.send_data({'sys_heat_cool_mode': '1'})
+        await self._async_send_data({'sys_heat_cool_mode': '1'})
         self._data['sys_heat_cool_mode'] = '1'
-        self._hass.async_create_task(self.call_state_update())
+        self.call_state_update()
 
     async def async_switch_to_heating(self):
         for thermostat in self._hass.data[self._unique_id]['thermostats']:
             if self.get_setpoint(thermostat) == self.get_max_limit(thermostat):
                 await self.async_set_setpoint(thermostat, self.get_min_limit(thermostat))
-        await self._client.send_data({'sys_heat_cool_mode': '0'})
+        await self._async_send_data({'sys_heat_cool_mode': '0'})
         self._data['sys_heat_cool_mode'] = '0'
-        self._hass.async_create_task(self.call_state_update())
+        self.call_state_update()
 
     async def async_turn_on(self, thermostat):
         await self.async_load_storage()
@@ -866,9 +1734,9 @@ class UponorStateProxy:
     async def async_set_away(self, is_away):
         var = 'sys_forced_eco_mode'
         data = "1" if is_away else "0"
-        await self._client.send_data({var: data})
+        await self._async_send_data({var: data})
         self._data[var] = data
-        self._hass.async_create_task(self.call_state_update())
+        self.call_state_update()
 
     def is_eco(self, thermostat):
         if self.get_eco_setback(thermostat) == 0:
@@ -886,8 +1754,110 @@ class UponorStateProxy:
     def get_last_update(self):
         return self.next_sp_from_dt
 
-    async def call_state_update(self):
-        async_dispatcher_send(self._hass, SIGNAL_UPONOR_STATE_UPDATE)
+    def get_update_signal(self, thermostat=None):
+        """Dispatcher signal for this gateway's controller and gateway entities,
+        or for the entities of one thermostat."""
+        signal = f"{SIGNAL_UPONOR_STATE_UPDATE}_{self._unique_id}"
+        return f"{signal}_{thermostat}" if thermostat else signal
+
+    def get_entry_id(self):
+        return self._config_entry.entry_id
+
+    def _gateway_snapshot(self):
+        return {
+            "name": self.get_integration_name(),
+            "available": self.is_available(),
+            "cooling": bool(self.is_cool_enabled()),
+            "away": self.is_away(),
+        }
+
+    def _thermostat_snapshot(self, thermostat):
+        return {
+            "name": self.get_room_name(thermostat),
+            "temperature": self.get_temperature(thermostat),
+            "setpoint": self.get_setpoint(thermostat),
+            "humidity": self.get_humidity(thermostat),
+            "preset": self.get_preset_mode(thermostat),
+            "action": str(self.get_hvac_action(thermostat)),
+            "status": self.get_status(thermostat),
+        }
+
+    def get_snapshot(self):
+        """Decoded state of the gateway and every thermostat in one plain dict."""
+        return {
+            "gateway": self._gateway_snapshot(),
+            "thermostats": {
+                thermostat: self._thermostat_snapshot(thermostat)
+                for thermostat in self._hass.data.get(self._unique_id, {}).get("thermostats", ())
+            },
+        }
+
+    @callback
+    def async_get_subscription_snapshot(self):
+        """Snapshot that the next diff sent to websocket subscribers is relative to."""
+        if self._snapshot is None:
+            self._snapshot = self.get_snapshot()
+        return {
+            "gateway": dict(self._snapshot["gateway"]),
+            "thermostats": {thermostat: dict(state) for thermostat, state in self._snapshot["thermostats"].items()},
+        }
+
+    @callback
+    def _async_send_snapshot_diff(self, thermostats):
+        """Send the fields of the gateway and `thermostats` that changed since the
+        last diff to websocket subscribers, the whole snapshot to new ones."""
+        if not self._hass.data.get(DOMAIN, {}).get("snapshot_subscribers"):
+            self._snapshot = None
+            return
+        if self._snapshot is None:
+            self._snapshot = diff = self.get_snapshot()
+        else:
+            diff = {}
+            gateway = self._gateway_snapshot()
+            changed = {key: value for key, value in gateway.items() if self._snapshot["gateway"].get(key) != value}
+            if changed:
+                diff["gateway"] = changed
+                self._snapshot["gateway"] = gateway
+            for thermostat in thermostats:
+                state = self._thermostat_snapshot(thermostat)
+                previous = self._snapshot["thermostats"].get(thermostat, {})
+                changed = {key: value for key, value in state.items() if previous.get(key) != value}
+                if changed:
+                    diff.setdefault("thermostats", {})[thermostat] = changed
+                    self._snapshot["thermostats"][thermostat] = state
+        if diff:
+            async_dispatcher_send(self._hass, SIGNAL_UPONOR_SNAPSHOT_DIFF, self.get_entry_id(), diff)
+
+    def set_full_broadcast(self, enabled):
+        """Update every entity after each poll instead of only those whose thermostat changed."""
+        self._full_broadcast = enabled
+
+    @callback
+    def call_state_update(self, changed=None):
+        """Tell entities to write their state.
+
+        Gateway and controller entities are always updated. Thermostat
+        entities are only updated when `changed` names a variable of their
+        thermostat; a variable not tied to one thermostat (or changed=None)
+        updates all of them.
+        """
+        async_dispatcher_send(self._hass, self.get_update_signal())
+        if self.is_aggregates_enabled():
+            # Every poll and availability change of a gateway can move the site aggregates
+            async_dispatcher_send(self._hass, SIGNAL_UPONOR_SITE_UPDATE)
+        thermostats = self._hass.data.get(self._unique_id, {}).get("thermostats", ())
+        if changed is not None and not self._full_broadcast:
+            targets = set()
+            for var in changed:
+                thermostat = thermostat_from_variable(var)
+                if thermostat is None:
+                    break
+                targets.add(thermostat)
+            else:
+                thermostats = [thermostat for thermostat in thermostats if thermostat in targets]
+        for thermostat in thermostats:
+            async_dispatcher_send(self._hass, self.get_update_signal(thermostat))
+        self._async_send_snapshot_diff(thermostats)
 
     # -------------------------------------------------------------------------
     # Polling & reload
@@ -899,49 +1869,129 @@ class UponorStateProxy:
             return
 
         async with self._update_lock:
+            profiler = self._profiler
+            if profiler is None:
+                return await self._async_poll()
+
+            profiler.cycle_started()
             try:
-                self.next_sp_from_dt = dt_util.now()
-                self._data = await self._client.get_data()
-                self._last_successful_update = dt_util.now()
-                self._unavailable_since = None
-                await self._async_persist_discovery_metadata()
-
-                self._hass.async_create_task(self.call_state_update())
-                return
-            except Exception as ex:
-                _LOGGER.error("Uponor thermostat was unable to update: %s", ex)
+                return await self._async_poll()
+            finally:
+                profiler.cycle_finished(self._unique_id)
 
-            now = dt_util.now()
-            if self._unavailable_since is None:
-                self._unavailable_since = now
-                return
+    def get_unique_id(self):
+        return self._unique_id
 
-            if now - self._unavailable_since <= UNAVAILABLE_THRESHOLD:
-                return
+    def get_host(self):
+        return self._host
 
-            if self._reload_in_progress:
-                return
+    def get_traffic_recorder(self):
+        return getattr(self._client, "recorder", None)
 
-            if self._last_reload_attempt is not None and now - self._last_reload_attempt <= RELOAD_COOLDOWN:
-                return
+    def set_traffic_recorder(self, recorder):
+        self._client.recorder = recorder
 
-            self._reload_in_progress = True
-            self._last_reload_attempt = now
-            _LOGGER.warning("Uponor entities have been unavailable for more than 2 minutes. Triggering reload...")
-            try:
-                await self._hass.config_entries.async_reload(self._config_entry.entry_id)
-            finally:
-                self._reload_in_progress = False
+    def set_profiler(self, profiler):
+        self._profiler = profiler
+
+    async def _async_poll(self):
+        try:
+            self.next_sp_from_dt = dt_util.now()
+            poll_started = time.monotonic()
+            data = await self._client.get_data()
+            # Time this poll holds the event loop: the JSON decoding and the
+            # processing stages below, but not the awaited network or disk I/O
+            processing_started = time.monotonic()
+            previous = self._data
+            self._data = data
+            changed = [var for var, value in data.items() if previous.get(var) != value]
+            self._stats.record_exchange(self._client.last_timing, len(data), len(changed))
+            if not self.is_available():
+                # Entities are coming back from unavailable. Values are only known
+                # to be current from now on, so the outage does not count as stale.
+                self._update_last_changed(data, time.time())
+                changed = None
+            else:
+                # Thermostats whose status switches to or from a stale reading are updated too
+                changed.extend(
+                    thermostat + '_room_temperature' for thermostat in self._update_last_changed(changed, time.time())
+                )
+            self._last_successful_update = dt_util.now()
+            self._unavailable_since = None
+            self._update_runtime()
+            self._record_history()
+            loop_time = time.monotonic() - processing_started
+            await self._async_retry_unapplied_writes(poll_started)
+            if self._pending_writes:
+                await self._async_flush_pending_writes()
+
+            stage_started = time.monotonic()
+            await self._async_persist_discovery_metadata()
+            self._stats.persist.add(time.monotonic() - stage_started)
+
+            processing_started = time.monotonic()
+            if changed is None or any(var.endswith('_presence') for var in changed):
+                await self._async_sync_thermostats()
+
+            dropped = self.invalidate_device_info(changed)
+            if dropped:
+                self._async_update_device_registry(dropped)
+
+            self.update_aggregates(changed)
+
+            stage_started = time.monotonic()
+            self.call_state_update(changed)
+            self._stats.dispatch.add(time.monotonic() - stage_started)
+            loop_time += time.monotonic() - processing_started
+            if self._client.last_timing is not None:
+                loop_time += self._client.last_timing[1]
+            self._stats.loop_time.add(loop_time)
+            return True
+        except Exception as ex:
+            self._stats.record_error(ex)
+            _LOGGER.error("Uponor thermostat was unable to update: %s", ex)
+            # Let the gateway status and error counters reflect the failure
+            self.call_state_update()
+
+        now = dt_util.now()
+        if self._unavailable_since is None:
+            self._unavailable_since = now
+            return False
+
+        if now - self._unavailable_since <= UNAVAILABLE_THRESHOLD:
+            return False
+
+        if self._reload_in_progress:
+            return False
+
+        if self._last_reload_attempt is not None and now - self._last_reload_attempt <= RELOAD_COOLDOWN:
+            return False
+
+        self._reload_in_progress = True
+        self._last_reload_attempt = now
+        self._reload_history.append(now.isoformat())
+        _LOGGER.warning("Uponor entities have been unavailable for more than 2 minutes. Triggering reload...")
+        try:
+            await self._hass.config_entries.async_reload(self._config_entry.entry_id)
+        finally:
+            self._reload_in_progress = False
+        return False
 
     async def async_set_variable(self, var_name, var_value):
-        _LOGGER.debug("Called set variable: name: %s, value: %s", var_name, var_value)
-        await self._client.send_data({var_name: var_value})
-        self._data[var_name] = var_value
-        self._hass.async_create_task(self.call_state_update())
+        await self.async_set_variables({var_name: var_value})
+
+    async def async_set_variables(self, variables):
+        """Write several variables in one request; returns the status of each."""
+        _LOGGER.debug("Called set variables: %s", variables)
+        await self._async_send_data(variables)
+        # As strings, like the gateway sends them back, so the next poll sees no change
+        self._data.update({var: str(value) for var, value in variables.items()})
+        self.call_state_update(variables)
+        return {var: "queued" if var in self._pending_writes else "ok" for var in variables}
 
     async def async_set_setpoint(self, thermostat, temp):
         var = thermostat + '_setpoint'
         setpoint = int(temp * 18 + self.get_active_setback(thermostat, temp) + 320)
-        await self._client.send_data({var: setpoint})
-        self._data[var] = setpoint
-        self._hass.async_create_task(self.call_state_update())
+        await self._async_send_data({var: setpoint})
+        self._data[var] = str(setpoint)
+        self.call_state_update([var])
@@ -0,0 +1,140 @@
+from .const import DEVICE_GATEWAY
+
+
+class AggregateGroup:
+    """Running mean/min/max room temperature, calling zones and summed PWM of a
+    group of thermostats. Temperatures are kept in integer tenths of °C so that
+    adding and removing values never drifts."""
+
+    __slots__ = ("temperature_sum", "temperature_count", "calling", "pwm", "_minimum", "_maximum", "_dirty")
+
+    def __init__(self):
+        self.temperature_sum = 0
+        self.temperature_count = 0
+        self.calling = 0
+        self.pwm = 0
+        self._minimum = None
+        self._maximum = None
+        self._dirty = False
+
+    def add(self, value):
+        temperature, active, pwm = value
+        if temperature is not None:
+            self.temperature_sum += temperature
+            self.temperature_count += 1
+            if not self._dirty:
+                self._minimum = temperature if self._minimum is None else min(self._minimum, temperature)
+                self._maximum = temperature if self._maximum is None else max(self._maximum, temperature)
+        self.calling += bool(active)
+        self.pwm += pwm or 0
+
+    def remove(self, value):
+        temperature, active, pwm = value
+        if temperature is not None:
+            self.temperature_sum -= temperature
+            self.temperature_count -= 1
+            # Only an extreme leaving the group needs a rescan of the members
+            if temperature in (self._minimum, self._maximum):
+                self._dirty = True
+        self.calling -= bool(active)
+        self.pwm -= pwm or 0
+
+    def rescan(self, temperatures):
+        temperatures = [temperature for temperature in temperatures if temperature is not None]
+        self._minimum = min(temperatures, default=None)
+        self._maximum = max(temperatures, default=None)
+        self._dirty = False
+
+    @property
+    def dirty(self):
+        return self._dirty
+
+    @property
+    def mean_temperature(self):
+        if not self.temperature_count:
+            return None
+        return round(self.temperature_sum / self.temperature_count / 10, 1)
+
+    @property
+    def min_temperature(self):
+        return self._minimum / 10 if self._minimum is not None else None
+
+    @property
+    def max_temperature(self):
+        return self._maximum / 10 if self._maximum is not None else None
+
+    @property
+    def calling_zones(self):
+        return self.calling
+
+    @property
+    def pwm_demand(self):
+        return self.pwm
+
+
+def combine_groups(groups):
+    """One group summarising several, e.g. the gateway groups of every config entry."""
+    combined = AggregateGroup()
+    for group in groups:
+        combined.temperature_sum += group.temperature_sum
+        combined.temperature_count += group.temperature_count
+        combined.calling += group.calling
+        combined.pwm += group.pwm
+        extremes = [value for value in (combined._minimum, group._minimum) if value is not None]
+        combined._minimum = min(extremes, default=None)
+        extremes = [value for value in (combined._maximum, group._maximum) if value is not None]
+        combined._maximum = max(extremes, default=None)
+    return combined
+
+
+class UponorAggregates:
+    """Aggregates per controller ('C1') and for the whole gateway (DEVICE_GATEWAY),
+    updated only from the thermostats whose values changed."""
+
+    def __init__(self):
+        # thermostat -> (room temperature in tenths, actuator on, PWM)
+        self._values = {}
+        self._groups = {}
+        self._members = {}
+
+    def get(self, group):
+        return self._groups.get(group)
+
+    def remove(self, thermostat):
+        """Drop a thermostat that is no longer paired."""
+        previous = self._values.pop(thermostat, None)
+        if previous is None:
+            return
+        for name in (thermostat.split('_')[0], DEVICE_GATEWAY):
+            self._members[name].remove(thermostat)
+            group = self._groups[name]
+            group.remove(previous)
+            if group.dirty:
+                group.rescan(self._values[member][0] for member in self._members[name])
+
+    def update(self, samples):
+        """Apply `samples` ({thermostat: (temperature °C, actuator on, PWM)}) and
+        return the groups that changed."""
+        touched = set()
+        for thermostat, (temperature, active, pwm) in samples.items():
+            value = (round(temperature * 10) if temperature is not None else None, bool(active), pwm or 0)
+            previous = self._values.get(thermostat)
+            if value == previous:
+                continue
+            self._values[thermostat] = value
+            for name in (thermostat.split('_')[0], DEVICE_GATEWAY):
+                group = self._groups.get(name)
+                if group is None:
+                    group = self._groups[name] = AggregateGroup()
+                    self._members[name] = []
+                if previous is None:
+                    self._members[name].append(thermostat)
+                else:
+                    group.remove(previous)
+                group.add(value)
+                touched.add(name)
+        for name in touched:
+            group = self._groups[name]
+            if group.dirty:
+                group.rescan(self._values[thermostat][0] for thermostat in self._members[name])
+        return touched
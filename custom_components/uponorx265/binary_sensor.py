@@ -1,25 +1,26 @@
 import logging
 
 from homeassistant.components.binary_sensor import BinarySensorDeviceClass, BinarySensorEntity
+from homeassistant.const import Platform
 
-from .const import CONF_BINARY_SENSOR_VALVE
 from .helper import get_unique_id_from_config_entry, UponorThermostatEntity
 
 _LOGGER = logging.getLogger(__name__)
 
 
 async def async_setup_entry(hass, entry, async_add_entities):
-    if not entry.data.get(CONF_BINARY_SENSOR_VALVE, False):
-        return
-
+    # Only set up while the valve sensors are enabled; turning them off in the
+    # options unloads the platform
     unique_id = get_unique_id_from_config_entry(entry)
     state_proxy = hass.data[unique_id]["state_proxy"]
 
-    entities = [
-        UponorValveSensor(unique_id, state_proxy, thermostat)
-        for thermostat in hass.data[unique_id]["thermostats"]
-    ]
-    async_add_entities(entities)
+    def create_entities(thermostats):
+        return [UponorValveSensor(unique_id, state_proxy, thermostat) for thermostat in thermostats]
+
+    async_add_entities(create_entities(hass.data[unique_id]["thermostats"]))
+
+    # Thermostats paired while running
+    state_proxy.add_entity_factory(Platform.BINARY_SENSOR, lambda thermostats: async_add_entities(create_entities(thermostats)))
 
 
 class UponorValveSensor(UponorThermostatEntity, BinarySensorEntity):
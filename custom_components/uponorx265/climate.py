@@ -7,12 +7,12 @@ from homeassistant.helpers.dispatcher import async_dispatcher_connect
 
 from homeassistant.const import (
     ATTR_TEMPERATURE,
+    Platform,
     UnitOfTemperature
 )
 
 from homeassistant.components.climate.const import (
     HVACMode,
-    HVACAction,
     PRESET_ECO,
     PRESET_AWAY,
     PRESET_COMFORT,
@@ -20,7 +20,6 @@ from homeassistant.components.climate.const import (
 )
 
 from .const import (
-    SIGNAL_UPONOR_STATE_UPDATE,
     DEVICE_MANUFACTURER,
     PRESET_MANUAL,
 )
@@ -33,19 +32,24 @@ async def async_setup_entry(hass, entry, async_add_entities):
     unique_id = get_unique_id_from_config_entry(entry)
     state_proxy = hass.data[unique_id]["state_proxy"]
 
-    entities = []
-    for thermostat in hass.data[unique_id]["thermostats"]:
-        entities.append(UponorClimate(unique_id, state_proxy, thermostat))
-    
+    def create_entities(thermostats):
+        return [UponorClimate(unique_id, state_proxy, thermostat) for thermostat in thermostats]
+
+    entities = create_entities(hass.data[unique_id]["thermostats"])
     if entities:
         async_add_entities(entities, update_before_add=False)
 
+    # Thermostats paired while running
+    state_proxy.add_entity_factory(Platform.CLIMATE, lambda thermostats: async_add_entities(create_entities(thermostats)))
+
 
 class UponorClimate(UponorThermostatEntity, ClimateEntity):
     _enable_turn_on_off_backwards_compatibility = False
     _attr_name = None  # Main entity — uses device name directly
     _attr_temperature_unit = UnitOfTemperature.CELSIUS
     _attr_preset_modes = [PRESET_COMFORT, PRESET_ECO, PRESET_AWAY, PRESET_MANUAL]
+    # Change with every actuator cycle; available as separate sensors
+    _unrecorded_attributes = frozenset({"status", "pulse_width_modulation", "eco_setback"})
     _attr_supported_features = (
         ClimateEntityFeature.TARGET_TEMPERATURE
         | ClimateEntityFeature.PRESET_MODE
@@ -60,22 +64,13 @@ class UponorClimate(UponorThermostatEntity, ClimateEntity):
         self._attr_unique_id = f"{unique_instance_id}_{state_proxy.get_thermostat_id(thermostat)}_climate"
 
     def _update_power_state(self):
-        temp_raw = self._state_proxy.get_setpoint_raw(self._thermostat)
-        is_cool = self._state_proxy.is_cool_enabled()
-        min_temp = self.min_temp
-        max_temp = self.max_temp
-
-        if temp_raw is None or is_cool is None or min_temp is None or max_temp is None:
-            self._is_on = True
-            return
-
-        self._is_on = not ((is_cool and temp_raw >= max_temp) or (not is_cool and temp_raw <= min_temp))
-
+        self._is_on = self._state_proxy.is_on(self._thermostat)
 
     @callback
     def _update_callback(self):
+        self._state_proxy.record_dispatch(self.entity_id)
         self._update_power_state()
-        self.async_schedule_update_ha_state(True)
+        self.async_write_ha_state()
 
     @property
     def hvac_modes(self):
@@ -113,13 +108,7 @@ class UponorClimate(UponorThermostatEntity, ClimateEntity):
     
     @property
     def preset_mode(self):
-        if self._state_proxy.get_local_override(self._thermostat):
-            return PRESET_MANUAL
-        if self._state_proxy.is_eco(self._thermostat):
-            return PRESET_ECO
-        if self._state_proxy.is_away():
-            return PRESET_AWAY
-        return PRESET_COMFORT
+        return self._state_proxy.get_preset_mode(self._thermostat)
 
     @property
     def hvac_mode(self):
@@ -129,11 +118,7 @@ class UponorClimate(UponorThermostatEntity, ClimateEntity):
 
     @property
     def hvac_action(self):
-        if not self._is_on:
-            return HVACAction.OFF
-        if self._state_proxy.is_active(self._thermostat):
-            return HVACAction.COOLING if self._state_proxy.is_cool_enabled() else HVACAction.HEATING
-        return HVACAction.IDLE
+        return self._state_proxy.get_hvac_action(self._thermostat)
 
     async def async_turn_off(self):
         if self._is_on:
@@ -11,15 +11,28 @@ from homeassistant.const import (
 )
 
 from .jnap import UponorJnap
+from .discovery import async_default_subnet, async_discover_gateways, parse_subnet
 
 from .const import (
     DOMAIN,
     CONF_UNIQUE_ID,
+    CONF_SUBNET,
     DEVICE_MANUFACTURER,
     CONF_CREATE_CONTROLLERS,
     CONF_SENSOR_TEMP,
     CONF_BINARY_SENSOR_VALVE,
     CONF_SWITCH_SENSOR_AVG,
+    CONF_WRITE_QUEUE,
+    CONF_HISTORY_PERSIST,
+    CONF_STALE_READING,
+    DEFAULT_STALE_READING,
+    CONF_AGGREGATES,
+    CONF_TEMP_DEADBAND,
+    CONF_TEMP_MIN_INTERVAL,
+    CONF_FLOOR_DEADBAND,
+    CONF_FLOOR_MIN_INTERVAL,
+    CONF_HUMIDITY_DEADBAND,
+    CONF_HUMIDITY_MIN_INTERVAL,
 )
 
 from .helper import (
@@ -31,15 +44,21 @@ _LOGGER = logging.getLogger(__name__)
 
 
 class DomainConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
+    # 2: entity unique_ids are prefixed with the entry's unique_id (see async_migrate_entry)
+    VERSION = 2
+
     def __init__(self):
         self._api_response = {}
         self._entry_data = {}
+        # host -> variables of the gateways found by the scan step
+        self._discovered = {}
 
     @property
     def schema(self):
         return vol.Schema(
             {
-                vol.Required(CONF_HOST): str,
+                # Empty: search the local network for gateways
+                vol.Optional(CONF_HOST): str,
                 vol.Required(CONF_NAME, default=DEVICE_MANUFACTURER): str,
                 vol.Optional(CONF_UNIQUE_ID): str,
             }
@@ -55,6 +74,10 @@ class DomainConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             await self.async_set_unique_id(unique_id)
             self._abort_if_unique_id_configured()
 
+            if not user_input.get(CONF_HOST, "").strip():
+                self._entry_data = user_input
+                return await self.async_step_scan()
+
             try:
                 session = async_get_clientsession(self.hass)
                 client = UponorJnap(user_input[CONF_HOST], session)
@@ -73,6 +96,42 @@ class DomainConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         return self.async_show_form(step_id="user", data_schema=self.schema)
 
+    async def async_step_scan(self, user_input=None):
+        """Search a subnet for gateways."""
+        errors = {}
+        if user_input is not None:
+            network = parse_subnet(user_input[CONF_SUBNET])
+            if network is None:
+                errors[CONF_SUBNET] = "invalid_subnet"
+            else:
+                configured = {entry.data.get(CONF_HOST) for entry in self._async_current_entries()}
+                found = await async_discover_gateways(async_get_clientsession(self.hass), network, configured)
+                if found:
+                    self._discovered = {host: data for host, _, data in found}
+                    return self.async_show_form(
+                        step_id="scan_result",
+                        data_schema=self.get_scan_result_schema(found),
+                    )
+                errors["base"] = "no_gateways"
+
+        subnet = user_input[CONF_SUBNET] if user_input is not None else await async_default_subnet(self.hass)
+        return self.async_show_form(
+            step_id="scan",
+            data_schema=vol.Schema({vol.Required(CONF_SUBNET, default=subnet): str}),
+            errors=errors,
+        )
+
+    async def async_step_scan_result(self, user_input=None):
+        """Pick one of the gateways found; its response fills in the controller and room steps."""
+        if user_input is None or user_input[CONF_HOST] not in self._discovered:
+            return await self.async_step_scan()
+        self._api_response = self._discovered[user_input[CONF_HOST]]
+        self._entry_data = {**self._entry_data, CONF_HOST: user_input[CONF_HOST]}
+        return self.async_show_form(
+            step_id="controllers",
+            data_schema=self.get_controllers_schema(),
+        )
+
     async def async_step_controllers(self, user_input=None):
         """Handle controller naming step."""
         if user_input is None:
@@ -129,6 +188,22 @@ class DomainConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 CONF_SWITCH_SENSOR_AVG,
                 default=current_data.get(CONF_SWITCH_SENSOR_AVG, False),
             ): bool,
+            vol.Required(
+                CONF_WRITE_QUEUE,
+                default=current_data.get(CONF_WRITE_QUEUE, False),
+            ): bool,
+            vol.Required(
+                CONF_HISTORY_PERSIST,
+                default=current_data.get(CONF_HISTORY_PERSIST, False),
+            ): bool,
+            vol.Required(
+                CONF_STALE_READING,
+                default=current_data.get(CONF_STALE_READING, DEFAULT_STALE_READING),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=1440)),
+            vol.Required(
+                CONF_AGGREGATES,
+                default=current_data.get(CONF_AGGREGATES, False),
+            ): bool,
         })
 
     def get_controllers_schema(self, current_data=None):
@@ -143,6 +218,18 @@ class DomainConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             controllers_schema[vol.Optional(c.lower(), default=self.get_controller_name(c))] = str
         return vol.Schema(controllers_schema)
 
+    @staticmethod
+    def get_scan_result_schema(found):
+        """Gateways fastest first, labelled with their latency and number of rooms."""
+        choices = {}
+        for host, latency, data in found:
+            rooms = sum(
+                1 for c in range(1, 5) for i in range(1, 13)
+                if data.get(f"C{c}_thermostat_{i}_presence") == "1"
+            )
+            choices[host] = f"{host} ({latency * 1000:.0f} ms, {rooms} rooms)"
+        return vol.Schema({vol.Required(CONF_HOST, default=found[0][0]): vol.In(choices)})
+
     def get_rooms_schema(self):
         rooms_schema = {}
         for t in self.get_active_thermostats():
@@ -218,13 +305,26 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
     async def async_step_features(self, user_input=None):
         current_data = self.config_entry.data
         if user_input is not None:
-            data = {**self._pending_data, **user_input}
-            return self.async_create_entry(title=current_data['name'], data=data)
+            self._pending_data = {**self._pending_data, **user_input}
+            return self.async_show_form(
+                step_id="publishing",
+                data_schema=self._publishing_schema(current_data),
+            )
         return self.async_show_form(
             step_id="features",
             data_schema=self._features_schema(current_data),
         )
 
+    async def async_step_publishing(self, user_input=None):
+        current_data = self.config_entry.data
+        if user_input is not None:
+            data = {**self._pending_data, **user_input}
+            return self.async_create_entry(title=current_data['name'], data=data)
+        return self.async_show_form(
+            step_id="publishing",
+            data_schema=self._publishing_schema(current_data),
+        )
+
     def _features_schema(self, current_data):
         return vol.Schema({
             vol.Required(
@@ -239,4 +339,35 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 CONF_SWITCH_SENSOR_AVG,
                 default=current_data.get(CONF_SWITCH_SENSOR_AVG, False),
             ): bool,
+            vol.Required(
+                CONF_WRITE_QUEUE,
+                default=current_data.get(CONF_WRITE_QUEUE, False),
+            ): bool,
+            vol.Required(
+                CONF_HISTORY_PERSIST,
+                default=current_data.get(CONF_HISTORY_PERSIST, False),
+            ): bool,
+            vol.Required(
+                CONF_STALE_READING,
+                default=current_data.get(CONF_STALE_READING, DEFAULT_STALE_READING),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=1440)),
+            vol.Required(
+                CONF_AGGREGATES,
+                default=current_data.get(CONF_AGGREGATES, False),
+            ): bool,
         })
+
+    def _publishing_schema(self, current_data):
+        schema = {}
+        for deadband, min_interval, max_deadband in (
+            (CONF_TEMP_DEADBAND, CONF_TEMP_MIN_INTERVAL, 5),
+            (CONF_FLOOR_DEADBAND, CONF_FLOOR_MIN_INTERVAL, 5),
+            (CONF_HUMIDITY_DEADBAND, CONF_HUMIDITY_MIN_INTERVAL, 20),
+        ):
+            schema[vol.Required(deadband, default=current_data.get(deadband, 0))] = vol.All(
+                vol.Coerce(float), vol.Range(min=0, max=max_deadband)
+            )
+            schema[vol.Required(min_interval, default=current_data.get(min_interval, 0))] = vol.All(
+                vol.Coerce(int), vol.Range(min=0, max=3600)
+            )
+        return vol.Schema(schema)
@@ -5,14 +5,35 @@ CONF_UNIQUE_ID = "unique_id"
 DOMAIN = "uponorx265"
 
 SIGNAL_UPONOR_STATE_UPDATE = "uponor_state_update"
+SIGNAL_UPONOR_SNAPSHOT_DIFF = "uponor_snapshot_diff"
+SIGNAL_UPONOR_SITE_UPDATE = "uponor_site_update"
 SCAN_INTERVAL = timedelta(seconds=30)
 UNAVAILABLE_THRESHOLD = timedelta(minutes=2)
 RELOAD_COOLDOWN = timedelta(minutes=10)
+POLL_MAX_CONCURRENT = 4
+POLL_BACKOFF_MAX = timedelta(seconds=90)
+POLL_STATS_WINDOW = 120
+
+WRITE_VERIFY_ATTEMPTS = 3
+SET_VARIABLE_CONCURRENCY = 16
+
+# Gateway discovery in the config flow: probes in flight, seconds per probe, largest subnet
+DISCOVERY_CONCURRENCY = 64
+DISCOVERY_TIMEOUT = 1.5
+DISCOVERY_MAX_HOSTS = 1024
+EVENT_WRITE_FAILED = "uponorx265_write_failed"
 
 STORAGE_KEY = "uponorx265_data"
 STORAGE_VERSION = 1
+# Runtime accumulators are saved at most this often; a clean unload always saves them
+RUNTIME_SAVE_INTERVAL = timedelta(minutes=10)
+RUNTIME_BUCKET = 3600
+RUNTIME_WINDOW = timedelta(hours=24)
+# Samples kept per thermostat: 24 hours of 30 s polls
+HISTORY_SIZE = 2880
 
 DEVICE_MANUFACTURER = "Uponor"
+DEVICE_GATEWAY = "gateway"
 
 STATUS_OK                       = 'ok'
 STATUS_ERROR_BATTERY            = 'battery_error'
@@ -24,6 +45,7 @@ STATUS_ERROR_RH_SENSOR          = 'rh_sensor_error'
 STATUS_ERROR_RF_SENSOR          = 'rf_sensor_error'
 STATUS_ERROR_TAMPER             = 'tamper_error'
 STATUS_ERROR_TOO_HIGH_TEMP      = 'api_error'
+STATUS_STALE_READING            = 'stale_reading'
 STATUS_ERROR_COMFAILOUT         = 'comfail_out'
 STATUS_ERROR_CONTROLER          = 'comfail_controller'
 STATUS_ONLINE                   = 'online'
@@ -31,9 +53,21 @@ STATUS_OFFLINE                  = 'offline'
 STATUS_ERROR_MAINCONTROLER_FAIL = 'comfail_main_controller'
 PRESET_MANUAL = 'ha_controlled'
 
+CONF_SUBNET = "subnet"
 CONF_CREATE_CONTROLLERS = "create_controllers"
 CONF_SENSOR_TEMP = "sensor_temperature"
 CONF_BINARY_SENSOR_VALVE = "binary_sensor_valve"
 CONF_SWITCH_SENSOR_AVG = "switch_sensor_avg"
+CONF_WRITE_QUEUE = "write_queue"
+CONF_HISTORY_PERSIST = "history_persist"
+CONF_STALE_READING = "stale_reading_minutes"
+CONF_AGGREGATES = "aggregate_sensors"
+CONF_TEMP_DEADBAND = "temperature_deadband"
+CONF_TEMP_MIN_INTERVAL = "temperature_min_interval"
+CONF_FLOOR_DEADBAND = "floor_deadband"
+CONF_FLOOR_MIN_INTERVAL = "floor_min_interval"
+CONF_HUMIDITY_DEADBAND = "humidity_deadband"
+CONF_HUMIDITY_MIN_INTERVAL = "humidity_min_interval"
 TOO_HIGH_TEMP_LIMIT = 4508
+DEFAULT_STALE_READING = 0
 DEFAULT_TEMP = 20
@@ -0,0 +1,91 @@
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_HOST
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .helper import get_unique_id_from_config_entry
+
+TO_REDACT_ENTRY = {CONF_HOST}
+TO_REDACT_METADATA = {"gateway_id", "controller_ids", "ids"}
+
+
+def _redact_variables(data: dict) -> dict:
+    """Redact serial numbers and network identifiers from a raw JNAP snapshot."""
+    to_redact = {var for var in data if var.endswith("_id") or var.startswith("cust_ip")}
+    return async_redact_data(data, to_redact)
+
+
+def _decode_thermostat(proxy, thermostat) -> dict:
+    return {
+        "room_name": proxy.get_room_name(thermostat),
+        "model": proxy.get_thermostat_model(thermostat),
+        "sw_version": proxy.get_version(thermostat),
+        "temperature": proxy.get_temperature(thermostat),
+        "setpoint": proxy.get_setpoint(thermostat),
+        "min_limit": proxy.get_min_limit(thermostat),
+        "max_limit": proxy.get_max_limit(thermostat),
+        "humidity": proxy.get_humidity(thermostat),
+        "floor_temperature": proxy.get_floor_temperature(thermostat),
+        "local_override": proxy.get_local_override(thermostat),
+        "eco": proxy.is_eco(thermostat),
+        "eco_setback": proxy.get_eco_setback(thermostat),
+        "active": proxy.is_active(thermostat),
+        "pwm": proxy.get_pwm(thermostat),
+        "status": proxy.get_status(thermostat),
+    }
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    """Return diagnostics for a config entry."""
+    unique_id = get_unique_id_from_config_entry(entry)
+    entry_data = hass.data.get(unique_id)
+    result = {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT_ENTRY),
+            "options": async_redact_data(dict(entry.options), TO_REDACT_ENTRY),
+        },
+    }
+    if not entry_data:
+        return result
+
+    proxy = entry_data["state_proxy"]
+    thermostats = entry_data["thermostats"]
+    scheduler = hass.data.get(DOMAIN, {}).get("scheduler")
+
+    result.update({
+        "gateway": {
+            "model": proxy.get_model(),
+            "sw_version": proxy.get_sw_version(),
+            "cool_available": proxy.is_cool_available(),
+            "cool_enabled": proxy.is_cool_enabled(),
+            "away": proxy.is_away(),
+            "status": proxy.get_gateway_status(),
+        },
+        "controllers": {
+            controller: {
+                "name": proxy.get_controller_name(controller),
+                "model": str(proxy.get_controller_hardware(controller)),
+                "sw_version": proxy.get_controller_version(controller),
+                "status": proxy.get_controller_status(controller),
+                "average_temperature": proxy.get_controller_avgtemp(controller),
+            }
+            for controller in dict.fromkeys(thermostat.split('_')[0] for thermostat in thermostats)
+        },
+        "thermostats": {thermostat: _decode_thermostat(proxy, thermostat) for thermostat in thermostats},
+        "variables": _redact_variables(proxy.get_raw_data()),
+        "storage_metadata": async_redact_data(proxy.get_storage_metadata(), TO_REDACT_METADATA),
+        "writes": {
+            "pending": proxy.get_pending_writes(),
+            "unverified": proxy.get_unverified_writes(),
+        },
+        "availability": proxy.get_availability_state(),
+        "request_errors": [
+            {"time": when, "action": action, "attempt": attempt, "error": error, "retried": retried}
+            for when, action, attempt, error, retried in proxy.get_client_error_history()
+        ],
+        "scheduler": scheduler.get_schedule().get(unique_id) if scheduler is not None else None,
+        "poll_stats": proxy.get_poll_stats().as_dict(),
+        "dispatch_counts": proxy.get_dispatch_counts(),
+    })
+    return result
@@ -0,0 +1,74 @@
+import asyncio
+import ipaddress
+import logging
+import time
+
+import aiohttp
+
+from .const import DISCOVERY_CONCURRENCY, DISCOVERY_MAX_HOSTS, DISCOVERY_TIMEOUT
+from .jnap import UponorJnap
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def parse_subnet(subnet):
+    """The IPv4 network of `subnet` ('192.168.1.0/24', or an address of it), or
+    None when it is not one or has more than DISCOVERY_MAX_HOSTS addresses."""
+    try:
+        network = ipaddress.ip_network(subnet.strip(), strict=False)
+    except ValueError:
+        return None
+    if network.version != 4 or network.num_addresses > DISCOVERY_MAX_HOSTS:
+        return None
+    return network
+
+
+async def async_default_subnet(hass):
+    """The /24 of Home Assistant's own address, or "" when it is not known."""
+    try:
+        from homeassistant.components.network import async_get_source_ip
+
+        source_ip = await async_get_source_ip(hass)
+    except Exception:  # pylint: disable=broad-except
+        return ""
+    if not source_ip:
+        return ""
+    return str(ipaddress.ip_network(f"{source_ip}/24", strict=False))
+
+
+def _is_gateway(data):
+    return any(f"sys_controller_{c}_presence" in data for c in range(1, 5))
+
+
+async def async_discover_gateways(session, network, skip=(), concurrency=DISCOVERY_CONCURRENCY, timeout=DISCOVERY_TIMEOUT):
+    """Probe every host of `network` for the JNAP GetAttributes endpoint, at most
+    `concurrency` at a time, each with a single attempt of `timeout` seconds.
+
+    Returns (host, latency in seconds, variables) of every gateway that
+    answered, fastest first. Hosts in `skip` are not probed.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    probe_timeout = aiohttp.ClientTimeout(total=timeout, connect=timeout)
+
+    async def probe(host):
+        async with semaphore:
+            client = UponorJnap(host, session)
+            started = time.monotonic()
+            try:
+                data = await client.get_data(retries=0, timeout=probe_timeout)
+            except Exception:  # pylint: disable=broad-except
+                return None
+            latency = time.monotonic() - started
+        if not _is_gateway(data):
+            return None
+        return host, latency, data
+
+    hosts = [str(host) for host in network.hosts() if str(host) not in skip]
+    started = time.monotonic()
+    results = await asyncio.gather(*(probe(host) for host in hosts))
+    found = sorted((result for result in results if result is not None), key=lambda result: result[1])
+    _LOGGER.debug(
+        "Probed %d hosts of %s in %.1f s, found gateways at %s",
+        len(hosts), network, time.monotonic() - started, [host for host, _, _ in found],
+    )
+    return found
@@ -1,16 +1,17 @@
 import logging
+import re
+from functools import lru_cache
+
 from homeassistant.helpers.entity import Entity
 from homeassistant.core import callback
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
 
 import socket
-from getmac import get_mac_address
 
 from .const import (
     DOMAIN,
     CONF_UNIQUE_ID,
-    SIGNAL_UPONOR_STATE_UPDATE,
-    DEVICE_MANUFACTURER,
+    DEVICE_GATEWAY,
 )
 
 from homeassistant.config_entries import ConfigEntry
@@ -36,6 +37,63 @@ def generate_unique_id_from_user_input_conf_name(user_input):
 def get_unique_id_from_config_entry(config_entry: ConfigEntry):
     return config_entry.unique_id
 
+_THERMOSTAT_VARIABLE = re.compile(r"^(?:cust_)?(C\d)_(?:T|channel_|thermostat)(\d+)_")
+
+@lru_cache(maxsize=None)
+def thermostat_from_variable(var):
+    """Return the thermostat (e.g. 'C1_T3') a JNAP variable belongs to, or None for
+    controller and system variables."""
+    match = _THERMOSTAT_VARIABLE.match(var)
+    return f"{match.group(1)}_T{match.group(2)}" if match else None
+
+_DEVICE_VARIABLES = (
+    (re.compile(r"^(C\d_T\d+)_(?:thermostat_type|sw_version)$"), "{0}"),
+    (re.compile(r"^cust_(C\d_T\d+)_name$"), "{0}"),
+    (re.compile(r"^(C\d)_thermostat(\d+)_id$"), "{0}_T{1}"),
+    (re.compile(r"^(C\d)_(?:hardware_type|sw_version)$"), "{0}"),
+    (re.compile(r"^controller(\d)_id$"), "C{0}"),
+    (re.compile(r"^cust_Controller(\d)_Name$"), "C{0}"),
+    (re.compile(r"^(?:cust_SW_version_update|cust_ip_device|sys_controller_\d_presence|C\d_thermostat_\d+_presence)$"), DEVICE_GATEWAY),
+)
+
+@lru_cache(maxsize=None)
+def device_from_variable(var):
+    """Return the device whose static metadata (names, ids, models, firmware,
+    topology) a JNAP variable feeds: a thermostat, a controller, DEVICE_GATEWAY
+    for all devices, or None for runtime state."""
+    for pattern, device in _DEVICE_VARIABLES:
+        match = pattern.match(var)
+        if match:
+            return device.format(*match.groups())
+    return None
+
+@callback
+def async_reconcile_entities(platform, async_add_entities, wanted):
+    """Make a platform's entities match `wanted` after an options change.
+
+    `wanted` maps the unique_id of every entity the options ask for to a
+    callable creating it; only the ones the platform does not have yet are
+    created. Entities no longer wanted are removed along with their state, so
+    they do not linger as unavailable; their entity registry entries are kept,
+    and with them the user's entity_id, name and area when they come back.
+    """
+    current = {entity.unique_id for entity in platform.entities.values()}
+    for entity in list(platform.entities.values()):
+        if entity.unique_id not in wanted:
+            platform.hass.async_create_task(entity.async_remove(force_remove=True))
+    added = [create() for unique_id, create in wanted.items() if unique_id not in current]
+    if added:
+        async_add_entities(added)
+
+
+def _get_mac(host: str, network_request=False):
+    """Read the MAC address of `host` from the ARP cache. getmac is only needed
+    once per gateway, so it is imported here rather than with the integration."""
+    from getmac import get_mac_address
+
+    return get_mac_address(ip=host, network_request=network_request)
+
+
 def _get_mac_with_arp_refresh(host: str):
     """Prime the ARP cache with a UDP socket and then read the MAC address."""
     try:
@@ -45,12 +103,14 @@ def _get_mac_with_arp_refresh(host: str):
         sock.close()
     except Exception:
         pass
-    return get_mac_address(ip=host, network_request=True)
+    return _get_mac(host, network_request=True)
     
 class UponorThermostatEntity(Entity):
     """Base class for entity connected to termostat."""
 
     _attr_has_entity_name = True
+    # Subclasses setting this get the unique_id "<instance>_<thermostat id>_<suffix>"
+    _unique_id_suffix = None
 
     def __init__(self, unique_instance_id, state_proxy, thermostat):
         self._unique_instance_id = unique_instance_id
@@ -59,18 +119,17 @@ class UponorThermostatEntity(Entity):
         self._controller = thermostat.split('_')[0]
         self._controller_name = state_proxy.get_controller_name(self._controller)
         self._room_name = state_proxy.get_room_name(self._thermostat)
+        if self._unique_id_suffix is not None:
+            self._attr_unique_id = self.get_unique_id(unique_instance_id, state_proxy, thermostat)
+
+    @classmethod
+    def get_unique_id(cls, unique_instance_id, state_proxy, thermostat):
+        """The unique_id of the entity these arguments create, without creating it."""
+        return f"{unique_instance_id}_{state_proxy.get_thermostat_id(thermostat)}_{cls._unique_id_suffix}"
 
     @property
     def device_info(self):
-        return {
-            "identifiers": {(self._unique_instance_id, self._state_proxy.get_thermostat_id(self._thermostat))},
-            "name": self._state_proxy.get_room_name(self._thermostat),
-            "manufacturer": DEVICE_MANUFACTURER,
-            "model": self._state_proxy.get_thermostat_model(self._thermostat),
-            "sw_version": self._state_proxy.get_version(self._thermostat),
-            "serial_number": self._state_proxy.get_thermostat_id(self._thermostat),
-            "via_device": (self._unique_instance_id, self._state_proxy.get_controller_id(self._controller)),
-        }
+        return self._state_proxy.get_device_info(self._thermostat)
 
     @property
     def should_poll(self):
@@ -82,37 +141,40 @@ class UponorThermostatEntity(Entity):
 
     async def async_added_to_hass(self):
         self.async_on_remove(
-            async_dispatcher_connect(self.hass, SIGNAL_UPONOR_STATE_UPDATE, self._update_callback)
+            async_dispatcher_connect(
+                self.hass, self._state_proxy.get_update_signal(self._thermostat), self._update_callback
+            )
         )
 
     @callback
     def _update_callback(self):
         """Update sensor state. when data updates"""
-        _LOGGER.debug(f"Updating state for {self._attr_unique_id}")
-        self.async_schedule_update_ha_state(True)
+        self._state_proxy.record_dispatch(self.entity_id)
+        self.async_write_ha_state()
 
 class UponorControllerEntity(Entity):
     """Diagnostic sensor showing communication status for a controller."""
 
     _attr_has_entity_name = True
+    # Subclasses setting this get the unique_id "<instance>_<controller id>_<suffix>"
+    _unique_id_suffix = None
 
     def __init__(self, unique_instance_id, state_proxy, controller):
         self._unique_instance_id = unique_instance_id
         self._state_proxy = state_proxy
         self._controller = controller
         self._controller_name = state_proxy.get_controller_name(controller)
+        if self._unique_id_suffix is not None:
+            self._attr_unique_id = self.get_unique_id(unique_instance_id, state_proxy, controller)
+
+    @classmethod
+    def get_unique_id(cls, unique_instance_id, state_proxy, controller):
+        """The unique_id of the entity these arguments create, without creating it."""
+        return f"{unique_instance_id}_{state_proxy.get_controller_id(controller)}_{cls._unique_id_suffix}"
 
     @property
     def device_info(self):
-        return {
-            "identifiers": {(self._unique_instance_id, self._state_proxy.get_controller_id(self._controller))},
-            "name": self._controller_name,
-            "manufacturer": DEVICE_MANUFACTURER,
-            "model": self._state_proxy.get_controller_hardware(self._controller),
-            "sw_version": self._state_proxy.get_controller_version(self._controller),
-            "serial_number": self._state_proxy.get_controller_id(self._controller),
-            "via_device": (self._unique_instance_id, self._state_proxy.get_gateway_id()),
-        }
+        return self._state_proxy.get_device_info(self._controller)
 
     @property
     def available(self):
@@ -124,33 +186,37 @@ class UponorControllerEntity(Entity):
 
     async def async_added_to_hass(self):
         self.async_on_remove(
-            async_dispatcher_connect(self.hass, SIGNAL_UPONOR_STATE_UPDATE, self._update_callback)
+            async_dispatcher_connect(self.hass, self._state_proxy.get_update_signal(), self._update_callback)
         )
 
     @callback
     def _update_callback(self):
-        self.async_schedule_update_ha_state(True)
+        self._state_proxy.record_dispatch(self.entity_id)
+        self.async_write_ha_state()
         
 class UponorGatewayEntity(Entity):
     """Base class for entity connected to gatewayen."""
 
     _attr_has_entity_name = True
+    # Subclasses setting this get the unique_id "<instance>_<gateway id>_<suffix>"
+    _unique_id_suffix = None
 
     def __init__(self, unique_instance_id, state_proxy):
         self._unique_instance_id = unique_instance_id
         self._state_proxy = state_proxy
         self._gateway_id = self._state_proxy.get_gateway_id()
+        if self._unique_id_suffix is not None:
+            self._attr_unique_id = self.get_unique_id(unique_instance_id, state_proxy)
+
+    @classmethod
+    def get_unique_id(cls, unique_instance_id, state_proxy):
+        """The unique_id of the entity these arguments create, without creating it."""
+        return f"{unique_instance_id}_{state_proxy.get_gateway_id()}_{cls._unique_id_suffix}"
 
         
     @property
     def device_info(self):
-        return {
-            "identifiers": {(self._unique_instance_id, self._gateway_id)},
-            "name": self._state_proxy.get_integration_name(),
-            "manufacturer": DEVICE_MANUFACTURER,
-            "model": self._state_proxy.get_model(),
-            "serial_number": self._gateway_id,
-        }
+        return self._state_proxy.get_device_info(DEVICE_GATEWAY)
 
     @property
     def should_poll(self):
@@ -162,9 +228,10 @@ class UponorGatewayEntity(Entity):
 
     async def async_added_to_hass(self):
         self.async_on_remove(
-            async_dispatcher_connect(self.hass, SIGNAL_UPONOR_STATE_UPDATE, self._update_callback)
+            async_dispatcher_connect(self.hass, self._state_proxy.get_update_signal(), self._update_callback)
         )
 
     @callback
     def _update_callback(self):
-        self.async_schedule_update_ha_state(True)
\ No newline at end of file
+        self._state_proxy.record_dispatch(self.entity_id)
+        self.async_write_ha_state()
\ No newline at end of file
@@ -0,0 +1,184 @@
+import logging
+import mmap
+import os
+import re
+import struct
+
+from .const import HISTORY_SIZE
+
+_LOGGER = logging.getLogger(__name__)
+
+_MAGIC = b"UPXH"
+_VERSION = 1
+# magic, version, record size, records per thermostat
+_HEADER = struct.Struct("<4sHHI")
+# head (next slot to write), count
+_SEGMENT_HEADER = struct.Struct("<II")
+# time (epoch seconds), room / floor temperature and setpoint (tenths of °C),
+# humidity (%), PWM (%), actuator on
+_RECORD = struct.Struct("<IhhhBBB")
+
+# Room, floor and setpoint use this for "no value", the byte columns 255
+_MISSING_SHORT = -32768
+_MISSING_BYTE = 255
+
+# 4 controllers with up to 12 thermostats each; a thermostat's segment is fixed by its name
+_CONTROLLERS = 4
+_THERMOSTATS_PER_CONTROLLER = 12
+_THERMOSTAT = re.compile(r"^C([1-4])_T(\d{1,2})$")
+_SEGMENTS = _CONTROLLERS * _THERMOSTATS_PER_CONTROLLER
+# The header is followed by a table mapping each thermostat to the segment holding its samples
+_UNALLOCATED = 255
+
+FIELDS = ("room_temperature", "floor_temperature", "setpoint", "humidity", "pwm", "actuator")
+
+
+def _tenths(value):
+    return _MISSING_SHORT if value is None else int(round(value * 10))
+
+
+def _byte(value):
+    return _MISSING_BYTE if value is None else max(0, min(int(value), 254))
+
+
+def _segment_index(thermostat):
+    match = _THERMOSTAT.match(thermostat)
+    if match is None or not 1 <= int(match.group(2)) <= _THERMOSTATS_PER_CONTROLLER:
+        return None
+    return (int(match.group(1)) - 1) * _THERMOSTATS_PER_CONTROLLER + int(match.group(2)) - 1
+
+
+class UponorSampleHistory:
+    """Fixed-size ring of poll samples per thermostat, packed in one buffer.
+
+    Each record is 13 bytes of fixed-point integers. The buffer is a
+    bytearray that grows by one segment per thermostat seen, or a
+    memory-mapped file sized for every possible thermostat when `path` is
+    given, so the samples survive a restart. Opening and closing a
+    file-backed history does blocking I/O and belongs in the executor.
+    """
+
+    def __init__(self, size=HISTORY_SIZE, path=None):
+        self._size = size
+        self._path = path
+        self._segment_bytes = _SEGMENT_HEADER.size + size * _RECORD.size
+        self._file = None
+        if path is None:
+            self._buffer = bytearray(_HEADER.size + _SEGMENTS)
+            self._reset()
+        else:
+            self._buffer = self._open_file(path)
+
+    def _reset(self):
+        _HEADER.pack_into(self._buffer, 0, _MAGIC, _VERSION, _RECORD.size, self._size)
+        self._buffer[_HEADER.size:_HEADER.size + _SEGMENTS] = bytes([_UNALLOCATED]) * _SEGMENTS
+
+    def _open_file(self, path):
+        total = _HEADER.size + _SEGMENTS + _SEGMENTS * self._segment_bytes
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fresh = not os.path.exists(path) or os.path.getsize(path) != total
+        self._file = open(path, "w+b" if fresh else "r+b")
+        if fresh:
+            # Sparse on most filesystems: pages of unused segments take no disk space
+            self._file.truncate(total)
+        self._buffer = mmap.mmap(self._file.fileno(), total)
+        if not fresh and _HEADER.unpack_from(self._buffer, 0) != (_MAGIC, _VERSION, _RECORD.size, self._size):
+            _LOGGER.info("Discarding sample history in %s written with a different layout", path)
+            fresh = True
+        if fresh:
+            self._reset()
+        return self._buffer
+
+    def _segment_offset(self, thermostat, allocate=False):
+        index = _segment_index(thermostat)
+        if index is None:
+            return None
+        slot = self._buffer[_HEADER.size + index]
+        if slot == _UNALLOCATED:
+            if not allocate:
+                return None
+            slot = sum(1 for value in self._buffer[_HEADER.size:_HEADER.size + _SEGMENTS] if value != _UNALLOCATED)
+            if self._file is None:
+                self._buffer.extend(bytes(self._segment_bytes))
+            self._buffer[_HEADER.size + index] = slot
+        return _HEADER.size + _SEGMENTS + slot * self._segment_bytes
+
+    @property
+    def path(self):
+        return self._path
+
+    def close(self):
+        if self._file is None:
+            return
+        self._buffer.flush()
+        self._buffer.close()
+        self._file.close()
+        self._file = None
+
+    def record(self, thermostat, timestamp, room, floor, setpoint, humidity, pwm, active):
+        offset = self._segment_offset(thermostat, allocate=True)
+        if offset is None:
+            return
+        head, count = _SEGMENT_HEADER.unpack_from(self._buffer, offset)
+        _RECORD.pack_into(
+            self._buffer,
+            offset + _SEGMENT_HEADER.size + head * _RECORD.size,
+            int(timestamp), _tenths(room), _tenths(floor), _tenths(setpoint),
+            _byte(humidity), _byte(pwm), _MISSING_BYTE if active is None else int(bool(active)),
+        )
+        _SEGMENT_HEADER.pack_into(self._buffer, offset, (head + 1) % self._size, min(count + 1, self._size))
+
+    def remove(self, thermostat):
+        """Drop the samples of a thermostat that is gone for good and free its segment.
+
+        The last segment moves into the freed one, so the segments in use stay
+        contiguous and a bytearray buffer shrinks by one segment.
+        """
+        index = _segment_index(thermostat)
+        if index is None or self._buffer[_HEADER.size + index] == _UNALLOCATED:
+            return
+        table = self._buffer[_HEADER.size:_HEADER.size + _SEGMENTS]
+        slot = table[index]
+        last = sum(1 for value in table if value != _UNALLOCATED) - 1
+        start = _HEADER.size + _SEGMENTS
+        last_offset = start + last * self._segment_bytes
+        if slot != last:
+            offset = start + slot * self._segment_bytes
+            self._buffer[offset:offset + self._segment_bytes] = self._buffer[last_offset:last_offset + self._segment_bytes]
+            self._buffer[_HEADER.size + table.index(last)] = slot
+        self._buffer[_HEADER.size + index] = _UNALLOCATED
+        if self._file is None:
+            del self._buffer[last_offset:]
+        else:
+            # A segment allocated later starts out empty
+            self._buffer[last_offset:last_offset + self._segment_bytes] = bytes(self._segment_bytes)
+
+    def _records(self, thermostat):
+        offset = self._segment_offset(thermostat)
+        if offset is None:
+            return
+        head, count = _SEGMENT_HEADER.unpack_from(self._buffer, offset)
+        start = offset + _SEGMENT_HEADER.size
+        first = (head - count) % self._size
+        # Oldest first: the part after the head, then the part before it. Slices
+        # are copies, so the bytearray can still grow while they are unpacked.
+        if first + count > self._size:
+            yield from _RECORD.iter_unpack(self._buffer[start + first * _RECORD.size:start + self._size * _RECORD.size])
+            yield from _RECORD.iter_unpack(self._buffer[start:start + head * _RECORD.size])
+        else:
+            yield from _RECORD.iter_unpack(self._buffer[start + first * _RECORD.size:start + (first + count) * _RECORD.size])
+
+    def query(self, thermostat, start=None, end=None):
+        """Samples of one thermostat between epoch seconds `start` and `end` as columns."""
+        columns = {"time": [], **{field: [] for field in FIELDS}}
+        for timestamp, room, floor, setpoint, humidity, pwm, active in self._records(thermostat):
+            if (start is not None and timestamp < start) or (end is not None and timestamp > end):
+                continue
+            columns["time"].append(timestamp)
+            columns["room_temperature"].append(None if room == _MISSING_SHORT else room / 10)
+            columns["floor_temperature"].append(None if floor == _MISSING_SHORT else floor / 10)
+            columns["setpoint"].append(None if setpoint == _MISSING_SHORT else setpoint / 10)
+            columns["humidity"].append(None if humidity == _MISSING_BYTE else humidity)
+            columns["pwm"].append(None if pwm == _MISSING_BYTE else pwm)
+            columns["actuator"].append(None if active == _MISSING_BYTE else bool(active))
+        return columns
@@ -2,20 +2,48 @@
 
 import asyncio
 import json
+import time
+from collections import deque
+
 import aiohttp
 from homeassistant.exceptions import HomeAssistantError
+import homeassistant.util.dt as dt_util
 
 REQUEST_RETRIES = 2
 RETRY_DELAY_SECONDS = 1
+ERROR_HISTORY_SIZE = 50
 REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=7, connect=2, sock_connect=2, sock_read=5)
 
+class UponorJnapRejected(ValueError):
+    """The gateway answered a SetAttributes request but did not accept it."""
+
 class UponorJnap:
     def __init__(self, host, session: aiohttp.ClientSession):
         self.url = "http://" + host + "/JNAP/"
         self.session = session
+        # (network seconds, decode seconds, payload bytes) of the last successful request
+        self.last_timing = None
+        # Recent failed attempts: (timestamp, JNAP action, attempt, error, retried)
+        self.error_history = deque(maxlen=ERROR_HISTORY_SIZE)
+        # Optional traffic.UponorTrafficRecorder logging every exchange
+        self.recorder = None
 
-    async def get_data(self):
-        res = await self.post(headers={"x-jnap-action": "http://phyn.com/jnap/uponorsky/GetAttributes"}, payload={})
+    async def get_data(self, retries=REQUEST_RETRIES, timeout=REQUEST_TIMEOUT):
+        try:
+            data = await self._get_data(retries, timeout)
+        except Exception as error:
+            if self.recorder is not None:
+                self.recorder.record_error("GetAttributes", error)
+            raise
+        if self.recorder is not None:
+            self.recorder.record_get(data)
+        return data
+
+    async def _get_data(self, retries, timeout):
+        res = await self.post(
+            headers={"x-jnap-action": "http://phyn.com/jnap/uponorsky/GetAttributes"}, payload={},
+            retries=retries, timeout=timeout,
+        )
         output = res.get("output")
         if not isinstance(output, dict):
             raise ValueError(f"Unexpected JNAP response: missing 'output'. keys={list(res.keys())}")
@@ -24,13 +52,28 @@ class UponorJnap:
         if not isinstance(vars_list, list):
             raise ValueError("Unexpected JNAP response: 'output.vars' missing or invalid")
 
-        return {
+        started = time.monotonic()
+        data = {
             item["waspVarName"]: item["waspVarValue"]
             for item in vars_list
             if isinstance(item, dict) and "waspVarName" in item and "waspVarValue" in item
         }
+        if self.last_timing is not None:
+            network, decode, size = self.last_timing
+            self.last_timing = (network, decode + time.monotonic() - started, size)
+        return data
 
     async def send_data(self, data):
+        try:
+            await self._send_data(data)
+        except Exception as error:
+            if self.recorder is not None:
+                self.recorder.record_error("SetAttributes", error)
+            raise
+        if self.recorder is not None:
+            self.recorder.record_set(data)
+
+    async def _send_data(self, data):
         payload = {
             "vars": [
                 {
@@ -43,24 +86,36 @@ class UponorJnap:
 
         r_json = await self.post(headers={"x-jnap-action": "http://phyn.com/jnap/uponorsky/SetAttributes"}, payload=payload)
         if r_json.get("result") != "OK":
-            raise ValueError(r_json)
+            raise UponorJnapRejected(r_json)
 
-    async def post(self, headers, payload):
+    async def post(self, headers, payload, retries=REQUEST_RETRIES, timeout=REQUEST_TIMEOUT):
         last_error = None
-        for attempt in range(REQUEST_RETRIES + 1):
+        for attempt in range(retries + 1):
             try:
+                started = time.monotonic()
                 async with self.session.post(
                     self.url,
                     headers=headers,
                     json=payload,
                     ssl=False,
-                    timeout=REQUEST_TIMEOUT,
+                    timeout=timeout,
                 ) as response:
                     response.raise_for_status()
-                    return await response.json()
+                    body = await response.read()
+                received = time.monotonic()
+                result = json.loads(body)
+                self.last_timing = (received - started, time.monotonic() - received, len(body))
+                return result
             except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as error:
                 last_error = error
-                if attempt < REQUEST_RETRIES:
+                self.error_history.append((
+                    dt_util.utcnow().isoformat(),
+                    headers.get("x-jnap-action", "").rsplit("/", 1)[-1],
+                    attempt,
+                    repr(error),
+                    attempt < retries,
+                ))
+                if attempt < retries:
                     await asyncio.sleep(RETRY_DELAY_SECONDS)
                     continue
                 raise HomeAssistantError(f"POST {self.url} failed: {last_error}") from error
@@ -0,0 +1,151 @@
+from aiohttp import web
+
+from homeassistant.components.http import KEY_HASS, HomeAssistantView
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Alarm bits of a thermostat, as <thermostat>_stat_<bit>
+THERMOSTAT_ALARMS = (
+    "battery_error",
+    "valve_position_err",
+    "air_sensor_error",
+    "external_sensor_err",
+    "rh_sensor_error",
+    "rf_error",
+    "tamper_alarm",
+)
+
+# name, type, help, value of a thermostat
+THERMOSTAT_METRICS = (
+    ("room_temperature_celsius", "gauge", "Room temperature", lambda proxy, t: proxy.get_temperature(t)),
+    ("floor_temperature_celsius", "gauge", "Floor temperature", lambda proxy, t: proxy.get_floor_temperature(t)),
+    ("setpoint_celsius", "gauge", "Target temperature", lambda proxy, t: proxy.get_setpoint(t)),
+    ("min_setpoint_celsius", "gauge", "Lowest allowed target temperature", lambda proxy, t: proxy.get_min_limit(t)),
+    ("max_setpoint_celsius", "gauge", "Highest allowed target temperature", lambda proxy, t: proxy.get_max_limit(t)),
+    ("eco_setback_celsius", "gauge", "ECO setback", lambda proxy, t: proxy.get_eco_setback(t)),
+    ("humidity_percent", "gauge", "Relative humidity", lambda proxy, t: proxy.get_humidity(t) if proxy.has_humidity_sensor(t) else None),
+    ("pwm_percent", "gauge", "Actuator PWM output", lambda proxy, t: proxy.get_pwm(t)),
+    ("actuator_on", "gauge", "Actuator open", lambda proxy, t: proxy.is_active(t)),
+    ("local_override", "gauge", "Setpoint controlled by Home Assistant", lambda proxy, t: proxy.get_local_override(t)),
+    ("eco", "gauge", "ECO mode active", lambda proxy, t: proxy.is_eco(t)),
+    ("reading_stale", "gauge", "Room temperature unchanged for longer than the stale reading threshold", lambda proxy, t: proxy.is_reading_stale(t)),
+    ("actuator_runtime_seconds", "counter", "Time the actuator was open", lambda proxy, t: proxy.get_runtime(t)),
+)
+
+
+@callback
+def async_setup_metrics_view(hass: HomeAssistant) -> None:
+    """Register the metrics endpoint once, when the http component is loaded."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if domain_data.get("metrics_registered") or hass.http is None:
+        return
+    domain_data["metrics_registered"] = True
+    hass.http.register_view(UponorMetricsView)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format(value) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return repr(float(value)) if isinstance(value, float) else str(int(value))
+
+
+def render_metrics(proxies) -> str:
+    """Render every decoded value of `proxies` ({unique_id: state_proxy}) in
+    OpenMetrics text format, straight from the proxies' current data."""
+    lines = []
+
+    def family(name, kind, help_text):
+        lines.append(f"# HELP uponorx265_{name} {help_text}")
+        lines.append(f"# TYPE uponorx265_{name} {kind}")
+
+    def sample(name, labels, value):
+        if value is not None:
+            lines.append(f"uponorx265_{name}{{{labels}}} {_format(value)}")
+
+    gateways = []
+    for unique_id, proxy in proxies.items():
+        thermostats = proxy.get_thermostats()
+        gateway = f'gateway="{_escape(unique_id)}"'
+        gateways.append((proxy, gateway, [(t, f'{gateway},thermostat="{t}"') for t in thermostats]))
+
+    family("gateway", "info", "Gateway")
+    for proxy, gateway, _ in gateways:
+        sample("gateway_info", f'{gateway},name="{_escape(proxy.get_integration_name())}",'
+               f'sw_version="{_escape(proxy.get_sw_version())}"', 1)
+    family("up", "gauge", "Gateway answered within the availability threshold")
+    for proxy, gateway, _ in gateways:
+        sample("up", gateway, proxy.is_available())
+    family("cooling", "gauge", "Cooling mode enabled")
+    for proxy, gateway, _ in gateways:
+        sample("cooling", gateway, proxy.is_cool_enabled())
+    family("away", "gauge", "Away (forced ECO) enabled")
+    for proxy, gateway, _ in gateways:
+        sample("away", gateway, proxy.is_away())
+
+    family("poll_seconds", "gauge", "Per-poll timings over the recent poll window")
+    for proxy, gateway, _ in gateways:
+        stats = proxy.get_poll_stats()
+        for stage in ("network", "decode", "persist", "dispatch"):
+            summary = getattr(stats, stage).summary()
+            for stat in ("p50", "p95", "max"):
+                sample("poll_seconds", f'{gateway},stage="{stage}",stat="{stat}"', summary.get(stat))
+    family("poll_variables", "gauge", "Variables in the last poll")
+    for proxy, gateway, _ in gateways:
+        sample("poll_variables", gateway, proxy.get_poll_stats().variables.last)
+    family("poll_errors", "counter", "Failed polls by exception type")
+    for proxy, gateway, _ in gateways:
+        for error, count in proxy.get_poll_stats().errors.items():
+            sample("poll_errors_total", f'{gateway},error="{_escape(error)}"', count)
+
+    family("controller_average_temperature_celsius", "gauge", "Average room temperature of a controller")
+    for proxy, gateway, _ in gateways:
+        for controller in proxy.get_active_controllers():
+            sample("controller_average_temperature_celsius", f'{gateway},controller="{controller}"',
+                   proxy.get_controller_avgtemp(controller))
+
+    family("thermostat", "info", "Thermostat")
+    for proxy, _, thermostats in gateways:
+        for thermostat, labels in thermostats:
+            # Empty when the gateway does not report the thermostat type
+            model = proxy.get_thermostat_model(thermostat)
+            sample("thermostat_info", f'{labels},room="{_escape(proxy.get_room_name(thermostat))}",'
+                   f'model="{_escape(model) if model is not None else ""}"', 1)
+    for name, kind, help_text, getter in THERMOSTAT_METRICS:
+        family(name, kind, help_text)
+        sample_name = f"{name}_total" if kind == "counter" else name
+        for proxy, _, thermostats in gateways:
+            for thermostat, labels in thermostats:
+                sample(sample_name, labels, getter(proxy, thermostat))
+    family("alarm", "gauge", "Thermostat alarm bit")
+    for proxy, _, thermostats in gateways:
+        for thermostat, labels in thermostats:
+            for alarm in THERMOSTAT_ALARMS:
+                value = proxy.get_variable(f"{thermostat}_stat_{alarm}")
+                if value is not None:
+                    sample("alarm", f'{labels},alarm="{alarm}"', value == "1")
+
+    lines.append("# EOF\n")
+    return "\n".join(lines)
+
+
+class UponorMetricsView(HomeAssistantView):
+    """Serve the decoded values of all gateways for Prometheus and other OpenMetrics scrapers."""
+
+    url = "/api/uponorx265/metrics"
+    name = "api:uponorx265:metrics"
+
+    async def get(self, request):
+        hass = request.app[KEY_HASS]
+        proxies = {}
+        for entry in hass.config_entries.async_entries(DOMAIN):
+            data = hass.data.get(entry.unique_id)
+            if data:
+                proxies[entry.unique_id] = data["state_proxy"]
+        return web.Response(body=render_metrics(proxies).encode(), headers={"Content-Type": CONTENT_TYPE})
@@ -0,0 +1,109 @@
+import asyncio
+import cProfile
+import os
+import pstats
+import tracemalloc
+
+
+def _short_path(filename):
+    return os.path.join(*filename.split(os.sep)[-2:]) if os.sep in filename else filename
+
+
+class UponorProfiler:
+    """cProfile (and optionally tracemalloc) across the next poll/dispatch cycles.
+
+    The profiler is switched on while at least one profiled gateway is inside
+    a poll cycle, so anything else the event loop runs in that window shows up
+    in the report too.
+    """
+
+    def __init__(self, unique_ids, cycles, trace_memory=False):
+        self._profile = cProfile.Profile()
+        self._remaining = {unique_id: cycles for unique_id in unique_ids}
+        self._cycles = cycles
+        self._active = 0
+        self._trace_memory = trace_memory
+        self._started_tracing = False
+        self._done = asyncio.Event()
+
+    def start(self):
+        if self._trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def cycle_started(self):
+        if self._active == 0:
+            self._profile.enable()
+        self._active += 1
+
+    def cycle_finished(self, unique_id):
+        if self._active == 0:
+            # Stopped while this cycle was running
+            return
+        self._active -= 1
+        if self._active == 0:
+            self._profile.disable()
+        if unique_id in self._remaining:
+            self._remaining[unique_id] -= 1
+        if all(remaining <= 0 for remaining in self._remaining.values()):
+            self._done.set()
+
+    async def async_wait(self, timeout):
+        try:
+            await asyncio.wait_for(self._done.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def stop(self):
+        """Switch cProfile and tracemalloc off again; safe to call more than once."""
+        if self._active:
+            self._profile.disable()
+            self._active = 0
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def report(self, top):
+        if self._active:
+            self._profile.disable()
+            self._active = 0
+
+        # Snapshot before building the report so its own allocations do not show up
+        snapshot = None
+        if self._trace_memory and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            self.stop()
+
+        result = {
+            "cycles": {
+                unique_id: self._cycles - max(remaining, 0)
+                for unique_id, remaining in self._remaining.items()
+            },
+            "complete": self._done.is_set(),
+            "functions": [],
+        }
+
+        stats = pstats.Stats(self._profile)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE)
+        for func in stats.fcn_list[:top]:
+            primitive_calls, calls, total_time, cumulative_time, _callers = stats.stats[func]
+            filename, line, name = func
+            result["functions"].append({
+                "function": f"{_short_path(filename)}:{line}({name})",
+                "calls": calls,
+                "primitive_calls": primitive_calls,
+                "total_time_ms": round(total_time * 1000, 3),
+                "cumulative_time_ms": round(cumulative_time * 1000, 3),
+            })
+
+        if snapshot is not None:
+            result["allocations"] = [
+                {
+                    "location": f"{_short_path(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+                    "size_kib": round(stat.size / 1024, 1),
+                    "count": stat.count,
+                }
+                for stat in snapshot.statistics("lineno")[:top]
+            ]
+
+        return result
@@ -0,0 +1,102 @@
+from collections import deque
+
+from .const import RUNTIME_BUCKET, RUNTIME_WINDOW, UNAVAILABLE_THRESHOLD
+
+
+class RuntimeAccumulator:
+    """Actuator-on time and PWM integrated over time for one thermostat or controller.
+
+    Totals only ever grow. The duty cycle is taken over hourly buckets
+    covering the last RUNTIME_WINDOW.
+    """
+
+    def __init__(self):
+        self.runtime = 0.0
+        self.pwm = 0.0
+        # [bucket start (epoch seconds), seconds on, PWM seconds, seconds observed]
+        self._buckets = deque(maxlen=int(RUNTIME_WINDOW.total_seconds() // RUNTIME_BUCKET))
+
+    def add(self, now, elapsed, active, pwm):
+        on = elapsed if active else 0
+        pwm_seconds = elapsed * pwm / 100 if pwm is not None else 0
+        self.runtime += on
+        self.pwm += pwm_seconds
+        start = now - now % RUNTIME_BUCKET
+        if not self._buckets or self._buckets[-1][0] != start:
+            self._buckets.append([start, 0.0, 0.0, 0.0])
+        bucket = self._buckets[-1]
+        bucket[1] += on
+        bucket[2] += pwm_seconds
+        bucket[3] += elapsed
+
+    def _window(self, now):
+        oldest = now - RUNTIME_WINDOW.total_seconds()
+        return [bucket for bucket in self._buckets if bucket[0] + RUNTIME_BUCKET > oldest]
+
+    def duty_cycle(self, now):
+        """Share of the window the actuator was on, in percent; None before anything was observed."""
+        buckets = self._window(now)
+        observed = sum(bucket[3] for bucket in buckets)
+        if not observed:
+            return None
+        return round(sum(bucket[1] for bucket in buckets) / observed * 100, 1)
+
+    def pwm_average(self, now):
+        buckets = self._window(now)
+        observed = sum(bucket[3] for bucket in buckets)
+        if not observed:
+            return None
+        return round(sum(bucket[2] for bucket in buckets) / observed * 100, 1)
+
+    def as_dict(self):
+        return {"runtime": self.runtime, "pwm": self.pwm, "buckets": [list(bucket) for bucket in self._buckets]}
+
+    def load(self, data):
+        self.runtime = float(data.get("runtime", 0))
+        self.pwm = float(data.get("pwm", 0))
+        self._buckets.clear()
+        self._buckets.extend([float(value) for value in bucket] for bucket in data.get("buckets", []) if len(bucket) == 4)
+
+
+class UponorRuntimeTracker:
+    """Accumulate actuator runtime per thermostat ('C1_T1') and controller ('C1') from polls.
+
+    Each poll credits the interval since the previous poll with the state
+    seen at the previous poll. Gaps longer than UNAVAILABLE_THRESHOLD (an
+    outage or a restart) are not credited, since the state during them is
+    unknown.
+    """
+
+    def __init__(self):
+        self._accumulators = {}
+        self._previous = {}
+        self._last_sample = None
+
+    def get(self, key):
+        accumulator = self._accumulators.get(key)
+        if accumulator is None:
+            accumulator = self._accumulators[key] = RuntimeAccumulator()
+        return accumulator
+
+    def update(self, sample, now):
+        """Record a poll; `sample` maps thermostat/controller to (actuator on, PWM %)."""
+        if self._last_sample is not None:
+            elapsed = now - self._last_sample
+            if 0 < elapsed <= UNAVAILABLE_THRESHOLD.total_seconds():
+                for key, (active, pwm) in self._previous.items():
+                    self.get(key).add(now, elapsed, active, pwm)
+        self._previous = sample
+        self._last_sample = now
+
+    def remove(self, key):
+        """Forget a thermostat or controller that is gone for good."""
+        self._accumulators.pop(key, None)
+        self._previous.pop(key, None)
+
+    def as_dict(self):
+        return {key: accumulator.as_dict() for key, accumulator in self._accumulators.items()}
+
+    def load(self, data):
+        for key, value in data.items():
+            if isinstance(value, dict):
+                self.get(key).load(value)
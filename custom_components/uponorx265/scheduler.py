@@ -0,0 +1,154 @@
+import asyncio
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    DOMAIN,
+    SCAN_INTERVAL,
+    POLL_MAX_CONCURRENT,
+    POLL_BACKOFF_MAX,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def backoff_delay(failures, interval, maximum):
+    """Seconds until the next poll after `failures` consecutive failed polls."""
+    if failures <= 0:
+        return interval
+    return min(interval * 2 ** (failures - 1), maximum)
+
+
+class _ScheduledGateway:
+    __slots__ = ("proxy", "phase", "next_due", "failures", "task")
+
+    def __init__(self, proxy):
+        self.proxy = proxy
+        self.phase = 0.0
+        self.next_due = 0.0
+        self.failures = 0
+        self.task = None
+
+
+class UponorPollScheduler:
+    """Poll every configured gateway from one shared timer.
+
+    Each gateway gets its own phase within SCAN_INTERVAL so their polls (and
+    the JSON decoding that follows) never land on the same tick: a gateway
+    that is added takes the middle of the widest gap between the phases in
+    use, and the others keep their phase, next poll and backoff. At most
+    POLL_MAX_CONCURRENT polls run at once and a failing gateway backs off
+    exponentially up to POLL_BACKOFF_MAX.
+    """
+
+    def __init__(self, hass: HomeAssistant, interval=SCAN_INTERVAL, max_concurrent=POLL_MAX_CONCURRENT):
+        self._hass = hass
+        self._interval = interval.total_seconds()
+        self._max_backoff = POLL_BACKOFF_MAX.total_seconds()
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._gateways = {}
+        self._epoch = None
+        self._timer = None
+
+    @callback
+    def async_register(self, unique_id, proxy):
+        """Start polling a gateway; returns a callback that stops it again."""
+        now = self._hass.loop.time()
+        if self._epoch is None:
+            self._epoch = now
+        gateway = _ScheduledGateway(proxy)
+        gateway.phase = self._free_phase()
+        # The gateway has just been polled by its own setup, so the first
+        # scheduled poll is never earlier than now.
+        gateway.next_due = self._next_slot(gateway, now + self._interval / 2)
+        self._gateways[unique_id] = gateway
+        self._reschedule()
+
+        @callback
+        def _unregister():
+            # A poll that is still running is left alone: it may be the one
+            # reloading this very config entry.
+            if self._gateways.get(unique_id) is gateway:
+                del self._gateways[unique_id]
+            self._reschedule()
+
+        return _unregister
+
+    def get_schedule(self):
+        now = self._hass.loop.time()
+        return {
+            unique_id: {
+                "phase": round(gateway.phase, 3),
+                "next_poll_in": round(gateway.next_due - now, 3),
+                "consecutive_failures": gateway.failures,
+                "polling": gateway.task is not None,
+            }
+            for unique_id, gateway in self._gateways.items()
+        }
+
+    def _next_slot(self, gateway, not_before):
+        """First time >= not_before that falls on the gateway's phase."""
+        offset = self._epoch + gateway.phase
+        cycles = max(0, -(-(not_before - offset) // self._interval))
+        return offset + cycles * self._interval
+
+    def _free_phase(self):
+        """Middle of the widest gap between the phases in use."""
+        phases = sorted(gateway.phase for gateway in self._gateways.values())
+        if not phases:
+            return 0.0
+        width, start = max(
+            (end - begin, begin) for begin, end in zip(phases, phases[1:] + [phases[0] + self._interval])
+        )
+        return (start + width / 2) % self._interval
+
+    def _reschedule(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._gateways:
+            self._epoch = None
+            return
+        self._schedule_next()
+
+    def _schedule_next(self):
+        if not self._gateways:
+            return
+        when = min(gateway.next_due for gateway in self._gateways.values())
+        self._timer = self._hass.loop.call_at(when, self._tick)
+
+    @callback
+    def _tick(self):
+        self._timer = None
+        now = self._hass.loop.time()
+        for unique_id, gateway in self._gateways.items():
+            if gateway.next_due > now:
+                continue
+            # Provisional slot; replaced once the poll finishes and the
+            # backoff for this gateway is known.
+            gateway.next_due = self._next_slot(gateway, now + self._interval / 2)
+            if gateway.task is None:
+                gateway.task = self._hass.async_create_background_task(
+                    self._async_poll(gateway), f"{DOMAIN} poll {unique_id}"
+                )
+        self._schedule_next()
+
+    async def _async_poll(self, gateway):
+        try:
+            async with self._semaphore:
+                success = await gateway.proxy.async_update()
+        finally:
+            gateway.task = None
+
+        if success is False:
+            gateway.failures += 1
+            backoff = backoff_delay(gateway.failures, self._interval, self._max_backoff)
+            if backoff > self._interval:
+                _LOGGER.debug("Backing off Uponor polls for %.0f s after %d failures", backoff, gateway.failures)
+            gateway.next_due = self._next_slot(gateway, self._hass.loop.time() + backoff - self._interval / 2)
+            if self._timer is not None:
+                self._timer.cancel()
+            self._schedule_next()
+        elif success:
+            gateway.failures = 0
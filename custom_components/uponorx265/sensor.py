@@ -1,54 +1,249 @@
 import logging
+import time
+from functools import partial
 
 from homeassistant.components.sensor import SensorEntity, SensorDeviceClass, SensorStateClass
-from homeassistant.const import UnitOfTemperature, PERCENTAGE
+from homeassistant.const import Platform, UnitOfTemperature, UnitOfTime, UnitOfInformation, PERCENTAGE
+from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers import entity_platform
 from homeassistant.helpers.entity import EntityCategory
-
-from .const import STATUS_OK, CONF_CREATE_CONTROLLERS, CONF_SENSOR_TEMP
-from .helper import get_unique_id_from_config_entry, UponorGatewayEntity, UponorThermostatEntity, UponorControllerEntity
+from homeassistant.helpers.event import async_call_later
+
+from .const import (
+    DOMAIN,
+    DEVICE_GATEWAY,
+    SIGNAL_UPONOR_SITE_UPDATE,
+    STATUS_OK,
+    CONF_CREATE_CONTROLLERS,
+    CONF_SENSOR_TEMP,
+    CONF_TEMP_DEADBAND,
+    CONF_TEMP_MIN_INTERVAL,
+    CONF_FLOOR_DEADBAND,
+    CONF_FLOOR_MIN_INTERVAL,
+    CONF_HUMIDITY_DEADBAND,
+    CONF_HUMIDITY_MIN_INTERVAL,
+    CONF_AGGREGATES,
+)
+from .aggregates import combine_groups
+from .helper import (
+    get_unique_id_from_config_entry,
+    async_reconcile_entities,
+    UponorGatewayEntity,
+    UponorThermostatEntity,
+    UponorControllerEntity,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+# translation key, poll stats window, unit, scale applied to the raw samples
+POLL_STAT_SENSORS = (
+    ("poll_loop_time", "loop_time", UnitOfTime.MILLISECONDS, 1000),
+    ("poll_network_time", "network", UnitOfTime.MILLISECONDS, 1000),
+    ("poll_decode_time", "decode", UnitOfTime.MILLISECONDS, 1000),
+    ("poll_payload_size", "payload_bytes", UnitOfInformation.BYTES, 1),
+    ("poll_variables", "variables", None, 1),
+    ("poll_changed_variables", "changed_variables", None, 1),
+    ("poll_persist_time", "persist", UnitOfTime.MILLISECONDS, 1000),
+    ("poll_dispatch_time", "dispatch", UnitOfTime.MILLISECONDS, 1000),
+)
+
+# aggregate (AggregateGroup property), unit, device class
+AGGREGATE_SENSORS = (
+    ("mean_temperature", UnitOfTemperature.CELSIUS, SensorDeviceClass.TEMPERATURE),
+    ("min_temperature", UnitOfTemperature.CELSIUS, SensorDeviceClass.TEMPERATURE),
+    ("max_temperature", UnitOfTemperature.CELSIUS, SensorDeviceClass.TEMPERATURE),
+    ("calling_zones", None, None),
+    ("pwm_demand", PERCENTAGE, None),
+)
+
 async def async_setup_entry(hass, entry, async_add_entities):
     unique_id = get_unique_id_from_config_entry(entry)
     _LOGGER.debug(f"unique id {unique_id} entety {entry} data = {entry.data}")
     state_proxy = hass.data[unique_id]["state_proxy"]
 
-    entities = []
-
-    # Gateway diagnostic sensor (one per integration)
-    entities.append(UponorGatewayStatusSensor(unique_id, state_proxy))
-
-    create_controllers = entry.data.get(CONF_CREATE_CONTROLLERS, True)
-    create_temp_sensor = entry.data.get(CONF_SENSOR_TEMP, True)
+    def add(wanted, cls, *id_args, extra=()):
+        """Add the unique_id of the entity `cls` creates for `id_args`, and how to create it."""
+        wanted[cls.get_unique_id(unique_id, state_proxy, *id_args)] = partial(cls, unique_id, state_proxy, *id_args, *extra)
+
+    def create_gateway_entities():
+        wanted = {}
+
+        # Gateway diagnostic sensor (one per integration)
+        add(wanted, UponorGatewayStatusSensor)
+        for translation_key, window, unit, scale in POLL_STAT_SENSORS:
+            add(wanted, UponorPollStatSensor, translation_key, extra=(window, unit, scale))
+        add(wanted, UponorPollErrorSensor)
+
+        if entry.data.get(CONF_AGGREGATES, False):
+            for aggregate, unit, device_class in AGGREGATE_SENSORS:
+                add(wanted, UponorGatewayAggregateSensor, aggregate, extra=(unit, device_class))
+        if state_proxy.is_site_owner():
+            wanted.update(create_site_entities())
+        return wanted
+
+    def create_site_entities():
+        # Sensors across all gateways, on the entry elected by _async_elect_site_owner
+        return {
+            UponorSiteAggregateSensor.get_unique_id(aggregate): partial(
+                UponorSiteAggregateSensor, state_proxy, aggregate, unit, device_class
+            )
+            for aggregate, unit, device_class in AGGREGATE_SENSORS
+        }
 
     seen_controllers = set()
-    for thermostat in hass.data[unique_id]["thermostats"]:
-        controller = thermostat.split('_')[0]
-        if controller not in seen_controllers:
-            seen_controllers.add(controller)
-            if create_controllers:
-                entities.append(UponorRoomAvg(unique_id, state_proxy, controller))
-                entities.append(UponorControllerStatusSensor(unique_id, state_proxy, controller))
-
-    for thermostat in hass.data[unique_id]["thermostats"]:
-        room_name = state_proxy.get_room_name(thermostat)
-        _LOGGER.debug(f"Adding sensors for {room_name} (thermostat ID: {thermostat})")
-        if create_temp_sensor:
-            entities.append(UponorRoomCurrentTemperatureSensor(unique_id, state_proxy, thermostat))
-        entities.append(UponorThermostatStatusSensor(unique_id, state_proxy, thermostat))
-
-        if state_proxy.has_floor_temperature(thermostat):
-            entities.append(UponorFloorTemperatureSensor(unique_id, state_proxy, thermostat))
-            _LOGGER.debug(f"Added floor sensor for: {room_name}")
-
-        if state_proxy.has_humidity_sensor(thermostat):
-            entities.append(UponorHumiditySensor(unique_id, state_proxy, thermostat))
-            _LOGGER.debug(f"Added humidity sensor for: {room_name}")
-
-    _LOGGER.debug(f"Total number of sensors added: {len(entities)}")
-    async_add_entities(entities)
 
+    def create_entities(thermostats):
+        create_controllers = entry.data.get(CONF_CREATE_CONTROLLERS, True)
+        create_temp_sensor = entry.data.get(CONF_SENSOR_TEMP, True)
+        create_aggregates = entry.data.get(CONF_AGGREGATES, False)
+        temp_publishing = (entry.data.get(CONF_TEMP_DEADBAND, 0), entry.data.get(CONF_TEMP_MIN_INTERVAL, 0))
+        floor_publishing = (entry.data.get(CONF_FLOOR_DEADBAND, 0), entry.data.get(CONF_FLOOR_MIN_INTERVAL, 0))
+        humidity_publishing = (entry.data.get(CONF_HUMIDITY_DEADBAND, 0), entry.data.get(CONF_HUMIDITY_MIN_INTERVAL, 0))
+
+        wanted = {}
+        for thermostat in thermostats:
+            controller = thermostat.split('_')[0]
+            if controller not in seen_controllers:
+                seen_controllers.add(controller)
+                if create_controllers:
+                    add(wanted, UponorRoomAvg, controller, extra=temp_publishing)
+                    add(wanted, UponorControllerStatusSensor, controller)
+                    add(wanted, UponorControllerRuntimeSensor, controller)
+                    add(wanted, UponorControllerDutyCycleSensor, controller)
+                    if create_aggregates:
+                        for aggregate, unit, device_class in AGGREGATE_SENSORS:
+                            add(wanted, UponorControllerAggregateSensor, controller, aggregate, extra=(unit, device_class))
+
+        for thermostat in thermostats:
+            room_name = state_proxy.get_room_name(thermostat)
+            _LOGGER.debug(f"Adding sensors for {room_name} (thermostat ID: {thermostat})")
+            if create_temp_sensor:
+                add(wanted, UponorRoomCurrentTemperatureSensor, thermostat, extra=temp_publishing)
+            add(wanted, UponorThermostatStatusSensor, thermostat)
+            add(wanted, UponorLastReadingSensor, thermostat)
+
+            if state_proxy.has_floor_temperature(thermostat):
+                add(wanted, UponorFloorTemperatureSensor, thermostat, extra=floor_publishing)
+                _LOGGER.debug(f"Added floor sensor for: {room_name}")
+
+            if state_proxy.has_humidity_sensor(thermostat):
+                add(wanted, UponorHumiditySensor, thermostat, extra=humidity_publishing)
+                _LOGGER.debug(f"Added humidity sensor for: {room_name}")
+
+            add(wanted, UponorPwmSensor, thermostat)
+            add(wanted, UponorEcoSetbackSensor, thermostat)
+            add(wanted, UponorThermostatRuntimeSensor, thermostat)
+            add(wanted, UponorThermostatDutyCycleSensor, thermostat)
+        return wanted
+
+    wanted = {**create_gateway_entities(), **create_entities(hass.data[unique_id]["thermostats"])}
+
+    _LOGGER.debug(f"Total number of sensors added: {len(wanted)}")
+    async_add_entities([create() for create in wanted.values()])
+
+    # Thermostats paired while running
+    state_proxy.add_entity_factory(
+        Platform.SENSOR,
+        lambda thermostats: async_add_entities([create() for create in create_entities(thermostats).values()]),
+    )
+
+    platform = entity_platform.async_get_current_platform()
+
+    @callback
+    def apply_options(data):
+        seen_controllers.clear()
+        async_reconcile_entities(
+            platform, async_add_entities,
+            {**create_gateway_entities(), **create_entities(hass.data[unique_id]["thermostats"])},
+        )
+        # Sensors that are kept only need the new deadbands and minimum intervals
+        for entity in platform.entities.values():
+            if isinstance(entity, UponorThrottledSensor):
+                entity.apply_publishing_options(data)
+
+    state_proxy.add_options_listener(Platform.SENSOR, apply_options)
+
+    async def async_apply_site_owner(owner):
+        site_entities = [entity for entity in platform.entities.values() if isinstance(entity, UponorSiteAggregateSensor)]
+        if owner is state_proxy:
+            if not site_entities:
+                await platform.async_add_entities([create() for create in create_site_entities().values()])
+            return
+        # The registry entries stay, for the new owner to take over or for when
+        # aggregates are enabled again
+        for entity in site_entities:
+            await entity.async_remove(force_remove=True)
+
+    state_proxy.set_site_owner_listener(async_apply_site_owner)
+
+
+class UponorThrottledSensor:
+    """Mixin for measurement sensors that skips state writes carrying no information.
+
+    A new value is only written when it differs from the last written one by
+    at least `deadband`, and no sooner than `min_interval` seconds after the
+    previous write; a change held back by the interval is written once it has
+    passed. Availability and attribute changes are always written.
+    """
+
+    _deadband = 0
+    _min_interval = 0
+    # Entry options holding the deadband and minimum interval, when configurable
+    _publishing_options = None
+    _published_value = None
+    _published_available = None
+    _published_attributes = None
+    _published_at = None
+    _publish_timer = None
+
+    def _set_publishing(self, deadband, min_interval):
+        self._deadband = deadband
+        self._min_interval = min_interval
+
+    def apply_publishing_options(self, data):
+        if self._publishing_options is not None:
+            deadband, min_interval = self._publishing_options
+            self._set_publishing(data.get(deadband, 0), data.get(min_interval, 0))
+
+    async def async_will_remove_from_hass(self):
+        if self._publish_timer is not None:
+            self._publish_timer()
+            self._publish_timer = None
+        await super().async_will_remove_from_hass()
+
+    @callback
+    def _update_callback(self):
+        self._state_proxy.record_dispatch(self.entity_id)
+        self._maybe_publish()
+
+    @callback
+    def _maybe_publish(self):
+        value = self.native_value
+        available = self.available
+        attributes = self.extra_state_attributes
+        if available == self._published_available and attributes == self._published_attributes:
+            if value == self._published_value:
+                return
+            if value is not None and self._published_value is not None:
+                if abs(value - self._published_value) < self._deadband:
+                    return
+                remaining = self._published_at + self._min_interval - time.monotonic()
+                if remaining > 0:
+                    if self._publish_timer is None:
+                        self._publish_timer = async_call_later(self.hass, remaining, self._deferred_publish)
+                    return
+
+        self._published_value = value
+        self._published_available = available
+        self._published_attributes = attributes
+        self._published_at = time.monotonic()
+        self.async_write_ha_state()
+
+    @callback
+    def _deferred_publish(self, _now):
+        self._publish_timer = None
+        self._maybe_publish()
 
 # ---------------------------------------------------------------------------
 # Diagnostic sensors
@@ -59,10 +254,7 @@ class UponorThermostatStatusSensor(UponorThermostatEntity, SensorEntity):
 
     _attr_entity_category = EntityCategory.DIAGNOSTIC
     _attr_translation_key = "thermostat_status"
-
-    def __init__(self, unique_instance_id, state_proxy, thermostat):
-        super().__init__(unique_instance_id, state_proxy, thermostat)
-        self._attr_unique_id = f"{unique_instance_id}_{state_proxy.get_thermostat_id(thermostat)}_status"
+    _unique_id_suffix = "status"
 
     @property
     def native_value(self):
@@ -73,15 +265,29 @@ class UponorThermostatStatusSensor(UponorThermostatEntity, SensorEntity):
         status = self._state_proxy.get_status(self._thermostat)
         return "mdi:check-circle-outline" if status == STATUS_OK else "mdi:alert-circle"
 
+class UponorLastReadingSensor(UponorThermostatEntity, SensorEntity):
+    """Diagnostic sensor showing when the room temperature of a thermostat last changed."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_device_class = SensorDeviceClass.TIMESTAMP
+    _attr_translation_key = "last_reading"
+    _unique_id_suffix = "last_reading"
+
+    @property
+    def native_value(self):
+        return self._state_proxy.get_last_reading(self._thermostat)
+
+    @property
+    def extra_state_attributes(self):
+        return {"stale": self._state_proxy.is_reading_stale(self._thermostat)}
+
 class UponorControllerStatusSensor(UponorControllerEntity,SensorEntity):
     """Diagnostic sensor showing communication status for a controller."""
 
     _attr_entity_category = EntityCategory.DIAGNOSTIC
     _attr_translation_key = "controller_status"
-
-    def __init__(self, unique_instance_id, state_proxy, controller):
-        super().__init__(unique_instance_id, state_proxy, controller)
-        self._attr_unique_id = f"{unique_instance_id}_{state_proxy.get_controller_id(controller)}_status"
+    _unique_id_suffix = "status"
 
     @property
     def native_value(self):
@@ -98,10 +304,7 @@ class UponorGatewayStatusSensor(UponorGatewayEntity, SensorEntity):
     _attr_entity_category = EntityCategory.DIAGNOSTIC
     _attr_available = True  # Always available so the sensor can show "Offline"
     _attr_translation_key = "gateway_status"
-
-    def __init__(self, unique_instance_id, state_proxy):
-        super().__init__(unique_instance_id, state_proxy)
-        self._attr_unique_id = f"{self._unique_instance_id}_{self._gateway_id}_gateway_status"
+    _unique_id_suffix = "gateway_status"
 
     @property
     def native_value(self):
@@ -111,18 +314,86 @@ class UponorGatewayStatusSensor(UponorGatewayEntity, SensorEntity):
     def icon(self):
         return "mdi:lan-connect" if self._state_proxy.is_available() else "mdi:lan-disconnect"
 
+    @property
+    def extra_state_attributes(self):
+        return {
+            "pending_writes": self._state_proxy.get_pending_writes(),
+            "unverified_writes": self._state_proxy.get_unverified_writes(),
+        }
+
+class UponorPollStatSensor(UponorGatewayEntity, SensorEntity):
+    """Diagnostic sensor showing the p95 of one per-poll measurement of the gateway."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _unrecorded_attributes = frozenset({"count", "last", "p50", "p95", "max"})
+
+    def __init__(self, unique_instance_id, state_proxy, translation_key, window, unit, scale):
+        super().__init__(unique_instance_id, state_proxy)
+        self._window = window
+        self._scale = scale
+        self._attr_translation_key = translation_key
+        self._attr_native_unit_of_measurement = unit
+        self._attr_unique_id = self.get_unique_id(unique_instance_id, state_proxy, translation_key)
+
+    @classmethod
+    def get_unique_id(cls, unique_instance_id, state_proxy, translation_key):
+        return f"{unique_instance_id}_{state_proxy.get_gateway_id()}_{translation_key}"
+
+    def _scaled(self, value):
+        return round(value * self._scale, 1) if value is not None else None
+
+    @property
+    def native_value(self):
+        window = self._state_proxy.get_poll_window(self._window)
+        if window is None or not len(window):
+            return None
+        return self._scaled(window.percentile(95))
+
+    @property
+    def extra_state_attributes(self):
+        window = self._state_proxy.get_poll_window(self._window)
+        if window is None:
+            return None
+        return {
+            key: value if key == "count" else self._scaled(value)
+            for key, value in window.summary().items()
+        }
+
+
+class UponorPollErrorSensor(UponorGatewayEntity, SensorEntity):
+    """Diagnostic sensor counting failed polls, broken down by exception type."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_available = True
+    _attr_translation_key = "poll_errors"
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _unique_id_suffix = "poll_errors"
+
+    @property
+    def native_value(self):
+        return sum(self._state_proxy.get_poll_stats().errors.values())
+
+    @property
+    def extra_state_attributes(self):
+        return dict(self._state_proxy.get_poll_stats().errors)
+
 # ---------------------------------------------------------------------------
 # Regular measurement sensors
 # ---------------------------------------------------------------------------
 
-class UponorFloorTemperatureSensor(UponorThermostatEntity, SensorEntity):
+class UponorFloorTemperatureSensor(UponorThrottledSensor, UponorThermostatEntity, SensorEntity):
     """Sensor showing floor temperature for a single thermostat."""
 
     _attr_translation_key = "floor_temp"
+    _publishing_options = (CONF_FLOOR_DEADBAND, CONF_FLOOR_MIN_INTERVAL)
+    _unique_id_suffix = "floor_temp"
 
-    def __init__(self, unique_instance_id, state_proxy, thermostat):
+    def __init__(self, unique_instance_id, state_proxy, thermostat, deadband=0, min_interval=0):
         super().__init__(unique_instance_id, state_proxy, thermostat)
-        self._attr_unique_id = f"{unique_instance_id}_{state_proxy.get_thermostat_id(thermostat)}_floor_temp"
+        self._set_publishing(deadband, min_interval)
         self._attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS
         self._attr_state_class = SensorStateClass.MEASUREMENT
 
@@ -134,14 +405,16 @@ class UponorFloorTemperatureSensor(UponorThermostatEntity, SensorEntity):
     def native_value(self):
         return self._state_proxy.get_floor_temperature(self._thermostat)
 
-class UponorRoomCurrentTemperatureSensor(UponorThermostatEntity, SensorEntity):
+class UponorRoomCurrentTemperatureSensor(UponorThrottledSensor, UponorThermostatEntity, SensorEntity):
     """Sensor showing current room temperature for a single thermostat."""
 
     _attr_translation_key = "room_temp"
+    _publishing_options = (CONF_TEMP_DEADBAND, CONF_TEMP_MIN_INTERVAL)
+    _unique_id_suffix = "current_temp"
 
-    def __init__(self, unique_instance_id, state_proxy, thermostat):
+    def __init__(self, unique_instance_id, state_proxy, thermostat, deadband=0, min_interval=0):
         super().__init__(unique_instance_id, state_proxy, thermostat)
-        self._attr_unique_id = f"{unique_instance_id}_{state_proxy.get_thermostat_id(thermostat)}_current_temp"
+        self._set_publishing(deadband, min_interval)
         self._attr_device_class = SensorDeviceClass.TEMPERATURE
         self._attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS
         self._attr_state_class = SensorStateClass.MEASUREMENT
@@ -150,12 +423,14 @@ class UponorRoomCurrentTemperatureSensor(UponorThermostatEntity, SensorEntity):
     def native_value(self):
         return self._state_proxy.get_temperature(self._thermostat)
 
-class UponorHumiditySensor(UponorThermostatEntity, SensorEntity):
+class UponorHumiditySensor(UponorThrottledSensor, UponorThermostatEntity, SensorEntity):
     _attr_translation_key = "humidity"
+    _publishing_options = (CONF_HUMIDITY_DEADBAND, CONF_HUMIDITY_MIN_INTERVAL)
+    _unique_id_suffix = "rh"
 
-    def __init__(self, unique_instance_id, state_proxy, thermostat):
+    def __init__(self, unique_instance_id, state_proxy, thermostat, deadband=0, min_interval=0):
         super().__init__(unique_instance_id, state_proxy, thermostat)
-        self._attr_unique_id = f"{unique_instance_id}_{state_proxy.get_thermostat_id(thermostat)}_rh"
+        self._set_publishing(deadband, min_interval)
         self._attr_device_class = SensorDeviceClass.HUMIDITY
         self._attr_native_unit_of_measurement = PERCENTAGE
         self._attr_state_class = SensorStateClass.MEASUREMENT
@@ -169,12 +444,42 @@ class UponorHumiditySensor(UponorThermostatEntity, SensorEntity):
     def native_value(self):
         return self._state_proxy.get_humidity(self._thermostat)
 
-class UponorRoomAvg(UponorControllerEntity, SensorEntity):
+class UponorPwmSensor(UponorThermostatEntity, SensorEntity):
+    """Sensor showing the underfloor heating PWM output of a thermostat's actuator."""
+
+    _attr_translation_key = "pwm"
+    _attr_entity_registry_enabled_default = False
+    _attr_native_unit_of_measurement = PERCENTAGE
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_icon = "mdi:pulse"
+    _unique_id_suffix = "pwm"
+
+    @property
+    def native_value(self):
+        return self._state_proxy.get_pwm(self._thermostat)
+
+class UponorEcoSetbackSensor(UponorThermostatEntity, SensorEntity):
+    """Sensor showing how far ECO mode lowers (heating) or raises (cooling) the setpoint."""
+
+    _attr_translation_key = "eco_setback"
+    _attr_entity_registry_enabled_default = False
+    _attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_icon = "mdi:leaf"
+    _unique_id_suffix = "eco_setback"
+
+    @property
+    def native_value(self):
+        return self._state_proxy.get_eco_setback(self._thermostat)
+
+class UponorRoomAvg(UponorThrottledSensor, UponorControllerEntity, SensorEntity):
     _attr_translation_key = "room_avg_temp"
+    _publishing_options = (CONF_TEMP_DEADBAND, CONF_TEMP_MIN_INTERVAL)
+    _unique_id_suffix = "average_room_temperature"
 
-    def __init__(self, unique_instance_id, state_proxy, controller):
+    def __init__(self, unique_instance_id, state_proxy, controller, deadband=0, min_interval=0):
         super().__init__(unique_instance_id, state_proxy, controller)
-        self._attr_unique_id = f"{unique_instance_id}_{state_proxy.get_controller_id(self._controller)}_average_room_temperature"
+        self._set_publishing(deadband, min_interval)
         self._attr_device_class = SensorDeviceClass.TEMPERATURE
         self._attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS
         self._attr_state_class = SensorStateClass.MEASUREMENT
@@ -182,3 +487,179 @@ class UponorRoomAvg(UponorControllerEntity, SensorEntity):
     @property
     def native_value(self):
         return self._state_proxy.get_controller_avgtemp(self._controller)
+
+# ---------------------------------------------------------------------------
+# Runtime and duty cycle
+# ---------------------------------------------------------------------------
+
+class UponorRuntimeSensor(UponorThrottledSensor):
+    """Mixin for sensors reading the proxy's runtime accumulators of `_runtime_key`.
+
+    The accumulators advance on every poll while an actuator is on, even when
+    none of the thermostat's variables changed, so these sensors follow the
+    gateway-wide update signal and only write when their value moved.
+    """
+
+    _runtime_key = None
+
+    async def async_added_to_hass(self):
+        self.async_on_remove(
+            async_dispatcher_connect(self.hass, self._state_proxy.get_update_signal(), self._update_callback)
+        )
+
+class UponorActuatorRuntimeSensor(UponorRuntimeSensor):
+    _attr_translation_key = "actuator_runtime"
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.HOURS
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_suggested_display_precision = 1
+    _attr_icon = "mdi:timer-outline"
+
+    @property
+    def native_value(self):
+        return round(self._state_proxy.get_runtime(self._runtime_key) / 3600, 2)
+
+class UponorDutyCycleSensor(UponorRuntimeSensor):
+    _attr_translation_key = "duty_cycle"
+    _attr_native_unit_of_measurement = PERCENTAGE
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_icon = "mdi:percent-outline"
+
+    @property
+    def native_value(self):
+        return self._state_proxy.get_duty_cycle(self._runtime_key)
+
+    @property
+    def extra_state_attributes(self):
+        return {"pwm_average": self._state_proxy.get_pwm_average(self._runtime_key)}
+
+class UponorThermostatRuntimeSensor(UponorActuatorRuntimeSensor, UponorThermostatEntity, SensorEntity):
+    """Total hours the actuator of a thermostat has been open."""
+
+    _attr_entity_registry_enabled_default = False
+    _unique_id_suffix = "actuator_runtime"
+
+    def __init__(self, unique_instance_id, state_proxy, thermostat):
+        super().__init__(unique_instance_id, state_proxy, thermostat)
+        self._runtime_key = thermostat
+
+class UponorThermostatDutyCycleSensor(UponorDutyCycleSensor, UponorThermostatEntity, SensorEntity):
+    """Share of the last 24 hours the actuator of a thermostat was open."""
+
+    _attr_entity_registry_enabled_default = False
+    _unique_id_suffix = "duty_cycle"
+
+    def __init__(self, unique_instance_id, state_proxy, thermostat):
+        super().__init__(unique_instance_id, state_proxy, thermostat)
+        self._runtime_key = thermostat
+
+class UponorControllerRuntimeSensor(UponorActuatorRuntimeSensor, UponorControllerEntity, SensorEntity):
+    """Total hours any actuator of a controller has been open."""
+    _unique_id_suffix = "actuator_runtime"
+
+    def __init__(self, unique_instance_id, state_proxy, controller):
+        super().__init__(unique_instance_id, state_proxy, controller)
+        self._runtime_key = controller
+
+class UponorControllerDutyCycleSensor(UponorDutyCycleSensor, UponorControllerEntity, SensorEntity):
+    """Share of the last 24 hours any actuator of a controller was open."""
+    _unique_id_suffix = "duty_cycle"
+
+    def __init__(self, unique_instance_id, state_proxy, controller):
+        super().__init__(unique_instance_id, state_proxy, controller)
+        self._runtime_key = controller
+
+# ---------------------------------------------------------------------------
+# Aggregates
+# ---------------------------------------------------------------------------
+
+class UponorAggregateSensor(UponorThrottledSensor):
+    """Mixin for sensors showing one aggregate of a group of thermostats.
+
+    The proxy keeps the aggregates up to date from the thermostats that changed
+    in each poll; these sensors only write when their value moved. Subclasses
+    define `_get_group`, returning the group's aggregates or None.
+    """
+
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def _set_aggregate(self, aggregate, unit, device_class):
+        self._aggregate = aggregate
+        self._attr_native_unit_of_measurement = unit
+        self._attr_device_class = device_class
+
+    @property
+    def native_value(self):
+        group = self._get_group()
+        return getattr(group, self._aggregate) if group is not None else None
+
+class UponorControllerAggregateSensor(UponorAggregateSensor, UponorControllerEntity, SensorEntity):
+    """Aggregate of the thermostats of one controller."""
+
+    def __init__(self, unique_instance_id, state_proxy, controller, aggregate, unit, device_class):
+        super().__init__(unique_instance_id, state_proxy, controller)
+        self._set_aggregate(aggregate, unit, device_class)
+        self._attr_translation_key = aggregate
+        self._attr_unique_id = self.get_unique_id(unique_instance_id, state_proxy, controller, aggregate)
+
+    @classmethod
+    def get_unique_id(cls, unique_instance_id, state_proxy, controller, aggregate):
+        return f"{unique_instance_id}_{state_proxy.get_controller_id(controller)}_{aggregate}"
+
+    def _get_group(self):
+        return self._state_proxy.get_aggregate(self._controller)
+
+class UponorGatewayAggregateSensor(UponorAggregateSensor, UponorGatewayEntity, SensorEntity):
+    """Aggregate of every thermostat of a gateway."""
+
+    def __init__(self, unique_instance_id, state_proxy, aggregate, unit, device_class):
+        super().__init__(unique_instance_id, state_proxy)
+        self._set_aggregate(aggregate, unit, device_class)
+        self._attr_translation_key = aggregate
+        self._attr_unique_id = self.get_unique_id(unique_instance_id, state_proxy, aggregate)
+
+    @classmethod
+    def get_unique_id(cls, unique_instance_id, state_proxy, aggregate):
+        return f"{unique_instance_id}_{state_proxy.get_gateway_id()}_{aggregate}"
+
+    def _get_group(self):
+        return self._state_proxy.get_aggregate(DEVICE_GATEWAY)
+
+class UponorSiteAggregateSensor(UponorAggregateSensor, SensorEntity):
+    """Aggregate of every thermostat of all gateways with aggregates enabled."""
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+
+    def __init__(self, state_proxy, aggregate, unit, device_class):
+        self._state_proxy = state_proxy
+        self._set_aggregate(aggregate, unit, device_class)
+        self._attr_translation_key = f"site_{aggregate}"
+        self._attr_unique_id = self.get_unique_id(aggregate)
+
+    @staticmethod
+    def get_unique_id(aggregate):
+        return f"{DOMAIN}_site_{aggregate}"
+
+    def _get_proxies(self):
+        proxies = []
+        for entry in self.hass.config_entries.async_entries(DOMAIN):
+            data = self.hass.data.get(entry.unique_id)
+            if data and data["state_proxy"].is_aggregates_enabled():
+                proxies.append(data["state_proxy"])
+        return proxies
+
+    @property
+    def available(self):
+        return any(proxy.is_available() for proxy in self._get_proxies())
+
+    def _get_group(self):
+        # Gateways that stopped answering would only contribute outdated values
+        groups = [
+            group for proxy in self._get_proxies()
+            if proxy.is_available() and (group := proxy.get_aggregate(DEVICE_GATEWAY)) is not None
+        ]
+        return combine_groups(groups) if groups else None
+
+    async def async_added_to_hass(self):
+        self.async_on_remove(async_dispatcher_connect(self.hass, SIGNAL_UPONOR_SITE_UPDATE, self._update_callback))
@@ -0,0 +1,79 @@
+import math
+from collections import Counter, deque
+
+from .const import POLL_STATS_WINDOW
+
+
+class RollingWindow:
+    """Fixed-size window of recent samples with percentile queries."""
+
+    def __init__(self, size=POLL_STATS_WINDOW):
+        self._samples = deque(maxlen=size)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def add(self, value):
+        self._samples.append(value)
+
+    @property
+    def last(self):
+        return self._samples[-1] if self._samples else None
+
+    def percentile(self, pct):
+        """Return the nearest-rank percentile, or None while the window is empty."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+        return ordered[rank - 1]
+
+    def summary(self):
+        if not self._samples:
+            return {"count": 0}
+        ordered = sorted(self._samples)
+        count = len(ordered)
+        return {
+            "count": count,
+            "last": self._samples[-1],
+            "p50": ordered[max(math.ceil(0.5 * count), 1) - 1],
+            "p95": ordered[max(math.ceil(0.95 * count), 1) - 1],
+            "max": ordered[-1],
+        }
+
+
+class UponorPollStats:
+    """Rolling per-poll timings and counters for one gateway."""
+
+    WINDOWS = (
+        "network",
+        "decode",
+        "payload_bytes",
+        "variables",
+        "changed_variables",
+        "persist",
+        "dispatch",
+        "loop_time",
+    )
+
+    def __init__(self):
+        for name in self.WINDOWS:
+            setattr(self, name, RollingWindow())
+        self.errors = Counter()
+
+    def record_exchange(self, timing, variables, changed_variables):
+        if timing is not None:
+            network, decode, payload_bytes = timing
+            self.network.add(network)
+            self.decode.add(decode)
+            self.payload_bytes.add(payload_bytes)
+        self.variables.add(variables)
+        self.changed_variables.add(changed_variables)
+
+    def record_error(self, error):
+        self.errors[type(error).__name__] += 1
+
+    def as_dict(self):
+        result = {name: getattr(self, name).summary() for name in self.WINDOWS}
+        result["errors"] = dict(self.errors)
+        return result
@@ -1,10 +1,14 @@
 import logging
+from functools import partial
 
 from homeassistant.components.switch import SwitchEntity
+from homeassistant.const import Platform
+from homeassistant.helpers import entity_platform
 
 from .const import PRESET_MANUAL, CONF_SWITCH_SENSOR_AVG
 from .helper import (
     get_unique_id_from_config_entry,
+    async_reconcile_entities,
     UponorGatewayEntity,
     UponorThermostatEntity,
 )
@@ -16,18 +20,40 @@ async def async_setup_entry(hass, entry, async_add_entities):
     unique_id = get_unique_id_from_config_entry(entry)
     state_proxy = hass.data[unique_id]["state_proxy"]
 
-    entities = [AwaySwitch(unique_id, state_proxy)]
+    def add(wanted, cls, *id_args):
+        wanted[cls.get_unique_id(unique_id, state_proxy, *id_args)] = partial(cls, unique_id, state_proxy, *id_args)
 
-    if state_proxy.is_cool_available():
-        entities.append(CoolSwitch(unique_id, state_proxy))
+    def create_gateway_entities():
+        wanted = {}
+        add(wanted, AwaySwitch)
 
-    for thermostat in hass.data[unique_id]["thermostats"]:
-        entities.append(LocalOverride(unique_id, state_proxy, thermostat))
-        
-        if entry.data.get(CONF_SWITCH_SENSOR_AVG, False):
-            entities.append(ClimatControlInAvg(unique_id, state_proxy, thermostat))
+        if state_proxy.is_cool_available():
+            add(wanted, CoolSwitch)
+        return wanted
+
+    def create_entities(thermostats):
+        wanted = {}
+        for thermostat in thermostats:
+            add(wanted, LocalOverride, thermostat)
+
+            if entry.data.get(CONF_SWITCH_SENSOR_AVG, False):
+                add(wanted, ClimatControlInAvg, thermostat)
+        return wanted
+
+    wanted = {**create_gateway_entities(), **create_entities(hass.data[unique_id]["thermostats"])}
+    async_add_entities([create() for create in wanted.values()])
+
+    # Thermostats paired while running
+    state_proxy.add_entity_factory(
+        Platform.SWITCH,
+        lambda thermostats: async_add_entities([create() for create in create_entities(thermostats).values()]),
+    )
 
-    async_add_entities(entities)
+    platform = entity_platform.async_get_current_platform()
+    state_proxy.add_options_listener(Platform.SWITCH, lambda data: async_reconcile_entities(
+        platform, async_add_entities,
+        {**create_gateway_entities(), **create_entities(hass.data[unique_id]["thermostats"])},
+    ))
 
 
 class AwaySwitch(UponorGatewayEntity, SwitchEntity):
@@ -36,7 +62,11 @@ class AwaySwitch(UponorGatewayEntity, SwitchEntity):
 
     def __init__(self, unique_instance_id, state_proxy):
         super().__init__(unique_instance_id, state_proxy)
-        self._attr_unique_id = f"{unique_instance_id}_away"
+        self._attr_unique_id = self.get_unique_id(unique_instance_id, state_proxy)
+
+    @classmethod
+    def get_unique_id(cls, unique_instance_id, state_proxy):
+        return f"{unique_instance_id}_away"
 
     @property
     def is_on(self):
@@ -57,7 +87,11 @@ class CoolSwitch(UponorGatewayEntity, SwitchEntity):
 
     def __init__(self, unique_instance_id, state_proxy):
         super().__init__(unique_instance_id, state_proxy)
-        self._attr_unique_id = f"{unique_instance_id}_cool"
+        self._attr_unique_id = self.get_unique_id(unique_instance_id, state_proxy)
+
+    @classmethod
+    def get_unique_id(cls, unique_instance_id, state_proxy):
+        return f"{unique_instance_id}_cool"
 
     @property
     def is_on(self):
@@ -74,10 +108,7 @@ class CoolSwitch(UponorGatewayEntity, SwitchEntity):
 
 class LocalOverride(UponorThermostatEntity, SwitchEntity):
     _attr_translation_key = "local_override"
-
-    def __init__(self, unique_instance_id, state_proxy, thermostat):
-        super().__init__(unique_instance_id, state_proxy, thermostat)
-        self._attr_unique_id = f"{unique_instance_id}_{state_proxy.get_thermostat_id(thermostat)}_local_override"
+    _unique_id_suffix = "local_override"
 
     @property
     def is_on(self):
@@ -93,10 +124,10 @@ class LocalOverride(UponorThermostatEntity, SwitchEntity):
 
 class ClimatControlInAvg(UponorThermostatEntity, SwitchEntity):
     _attr_translation_key = "avg_included"
+    _unique_id_suffix = "avg_included"
     
     def __init__(self, unique_instance_id, state_proxy, thermostat):
         super().__init__(unique_instance_id, state_proxy, thermostat)
-        self._attr_unique_id = f"{unique_instance_id}_{state_proxy.get_thermostat_id(thermostat)}_avg_included"
         self._attr_icon = "mdi:thermometer-check"
         
     @property
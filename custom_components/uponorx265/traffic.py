@@ -0,0 +1,140 @@
+"""Record JNAP traffic to disk and replay it in place of a real gateway."""
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from .jnap import ERROR_HISTORY_SIZE
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _dumps(record):
+    return json.dumps(record, separators=(",", ":"), ensure_ascii=False)
+
+
+class UponorTrafficRecorder:
+    """Append every JNAP exchange to a JSON-lines log.
+
+    GetAttributes records only carry the variables that changed since the
+    previous poll (plus the names of variables that disappeared), so a full
+    snapshot is written once and a typical poll costs a few hundred bytes.
+    """
+
+    def __init__(self, hass: HomeAssistant, path, host):
+        self._hass = hass
+        self.path = path
+        self._last = {}
+        self._buffer = []
+        self._flush_task = None
+        self.records = 0
+        self._append({"op": "start", "host": host})
+
+    def record_get(self, data):
+        changed = {var: value for var, value in data.items() if self._last.get(var) != value}
+        record = {"op": "get", "vars": changed}
+        removed = [var for var in self._last if var not in data]
+        if removed:
+            record["removed"] = removed
+        self._last = dict(data)
+        self._append(record)
+
+    def record_set(self, data):
+        self._append({"op": "set", "vars": {var: str(value) for var, value in data.items()}})
+
+    def record_error(self, action, error):
+        self._append({"op": "error", "action": action, "error": repr(error)})
+
+    def _append(self, record):
+        record["t"] = round(time.time(), 3)
+        self._buffer.append(_dumps(record))
+        self.records += 1
+        if self._flush_task is None:
+            self._flush_task = self._hass.async_create_background_task(
+                self._async_flush(), "uponorx265 traffic recorder"
+            )
+
+    async def _async_flush(self):
+        try:
+            while self._buffer:
+                lines, self._buffer = self._buffer, []
+                await self._hass.async_add_executor_job(self._write, "\n".join(lines) + "\n")
+        finally:
+            self._flush_task = None
+
+    def _write(self, text):
+        with open(self.path, "a", encoding="utf-8") as log:
+            log.write(text)
+
+    async def async_close(self):
+        if self._flush_task is not None:
+            await self._flush_task
+
+
+def load_traffic_log(path):
+    """Read a recorded log; blocking, run it in an executor."""
+    with open(path, encoding="utf-8") as log:
+        return [json.loads(line) for line in log if line.strip()]
+
+
+class UponorReplayJnap:
+    """Stand-in for UponorJnap that serves a recorded traffic log.
+
+    Each get_data() returns the gateway state of the next recorded poll (or
+    raises for a recorded failure). With speed=1.0 polls are released at the
+    pace they were recorded, larger values replay faster and speed=0 replays
+    as fast as the caller polls. Writes are applied to the replayed state and
+    kept in `writes`, so a proxy driven by the replay behaves as it would
+    against the real gateway.
+    """
+
+    def __init__(self, records, speed=1.0):
+        self._records = [record for record in records if record.get("op") == "get" or (
+            record.get("op") == "error" and record.get("action") == "GetAttributes"
+        )]
+        self._speed = speed
+        self._position = 0
+        self._state = {}
+        self._first_recorded = self._records[0]["t"] if self._records else None
+        self._started = None
+        self.writes = []
+        self.last_timing = None
+        self.error_history = deque(maxlen=ERROR_HISTORY_SIZE)
+
+    @property
+    def finished(self):
+        return self._position >= len(self._records)
+
+    async def get_data(self):
+        if self.finished:
+            raise HomeAssistantError("Replay log exhausted")
+
+        record = self._records[self._position]
+        self._position += 1
+
+        if self._speed:
+            now = time.monotonic()
+            if self._started is None:
+                self._started = now
+            due = self._started + (record["t"] - self._first_recorded) / self._speed
+            if due > now:
+                await asyncio.sleep(due - now)
+
+        if record["op"] == "error":
+            raise HomeAssistantError(f"Replayed failure: {record['error']}")
+
+        started = time.monotonic()
+        for var in record.get("removed", ()):
+            self._state.pop(var, None)
+        self._state.update(record["vars"])
+        data = dict(self._state)
+        self.last_timing = (0.0, time.monotonic() - started, 0)
+        return data
+
+    async def send_data(self, data):
+        self.writes.append(dict(data))
+        self._state.update({var: str(value) for var, value in data.items()})
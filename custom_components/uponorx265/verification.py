@@ -0,0 +1,120 @@
+import logging
+import time
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import issue_registry
+
+from .const import (
+    DOMAIN,
+    EVENT_WRITE_FAILED,
+    WRITE_VERIFY_ATTEMPTS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _values_match(expected, actual) -> bool:
+    if str(expected) == str(actual):
+        return True
+    try:
+        return float(expected) == float(actual)
+    except (TypeError, ValueError):
+        return False
+
+
+class UponorWriteVerifier:
+    """Track writes sent to the gateway and confirm them against the next poll.
+
+    A write is only checked against a poll that started after the write was
+    acknowledged, so a GetAttributes already in flight never counts as a miss.
+    """
+
+    def __init__(self, hass: HomeAssistant, unique_id, gateway_name, max_attempts=WRITE_VERIFY_ATTEMPTS):
+        self._hass = hass
+        self._unique_id = unique_id
+        self._gateway_name = gateway_name
+        self._max_attempts = max_attempts
+        # var -> [expected value, attempts, monotonic time the write was acknowledged]
+        self._pending = {}
+
+    def track(self, data):
+        sent_at = time.monotonic()
+        for var, value in data.items():
+            attempts = self._pending[var][1] if var in self._pending and _values_match(self._pending[var][0], value) else 0
+            self._pending[var] = [value, attempts, sent_at]
+
+    def get_pending(self):
+        return {var: entry[0] for var, entry in self._pending.items()}
+
+    def verify(self, data, poll_started):
+        """Compare tracked writes with a fresh poll.
+
+        Returns the variables that should be written again. Writes that keep
+        failing are dropped and reported through a repair issue and an event.
+        """
+        retry = {}
+        for var, entry in list(self._pending.items()):
+            expected, attempts, sent_at = entry
+            if sent_at > poll_started:
+                continue
+            if var not in data:
+                # Write-only variable, nothing to compare against.
+                del self._pending[var]
+                continue
+            if _values_match(expected, data[var]):
+                del self._pending[var]
+                self._clear_issue(var)
+                continue
+
+            attempts += 1
+            if attempts >= self._max_attempts:
+                del self._pending[var]
+                self._report_failure(var, expected, data[var], attempts)
+                continue
+
+            _LOGGER.debug("Uponor write %s=%s not applied (gateway reports %s), retrying", var, expected, data[var])
+            entry[1] = attempts
+            retry[var] = expected
+        return retry
+
+    def reject(self, data, reason):
+        """Report writes the gateway refused outright; they are not retried."""
+        for var, value in data.items():
+            self._pending.pop(var, None)
+            self._report_failure(var, value, None, 1, reason=str(reason))
+
+    def _issue_id(self, var):
+        return f"write_failed_{self._unique_id}_{var}"
+
+    def _report_failure(self, var, expected, actual, attempts, reason=None):
+        if reason is None:
+            _LOGGER.warning(
+                "Uponor gateway %s did not apply %s=%s after %d attempts (reports %s)",
+                self._gateway_name, var, expected, attempts, actual,
+            )
+        else:
+            _LOGGER.warning("Uponor gateway %s rejected %s=%s: %s", self._gateway_name, var, expected, reason)
+        self._hass.bus.async_fire(EVENT_WRITE_FAILED, {
+            "unique_id": self._unique_id,
+            "variable": var,
+            "expected": str(expected),
+            "actual": None if actual is None else str(actual),
+            "attempts": attempts,
+            "rejected": reason is not None,
+        })
+        issue_registry.async_create_issue(
+            self._hass,
+            DOMAIN,
+            self._issue_id(var),
+            is_fixable=False,
+            severity=issue_registry.IssueSeverity.WARNING,
+            translation_key="write_failed",
+            translation_placeholders={
+                "gateway": self._gateway_name,
+                "variable": var,
+                "value": str(expected),
+            },
+        )
+
+    def _clear_issue(self, var):
+        issue_registry.async_delete_issue(self._hass, DOMAIN, self._issue_id(var))
@@ -0,0 +1,86 @@
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+
+from .const import DOMAIN, SIGNAL_UPONOR_SNAPSHOT_DIFF
+
+
+@callback
+def async_setup_websocket_api(hass: HomeAssistant) -> None:
+    """Register the uponorx265 websocket commands once for all config entries."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if domain_data.get("websocket_registered"):
+        return
+    domain_data["websocket_registered"] = True
+    websocket_api.async_register_command(hass, websocket_snapshot)
+    websocket_api.async_register_command(hass, websocket_subscribe)
+
+
+def _get_proxies(hass: HomeAssistant, entry_id):
+    """Return {entry_id: state_proxy} of every loaded gateway, or only of `entry_id`."""
+    proxies = {}
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        data = hass.data.get(entry.unique_id)
+        if data and (entry_id is None or entry.entry_id == entry_id):
+            proxies[entry.entry_id] = data["state_proxy"]
+    return proxies
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "uponorx265/snapshot",
+        vol.Optional("entry_id"): str,
+    }
+)
+@callback
+def websocket_snapshot(hass, connection, msg):
+    """Return the decoded state of every thermostat of one or all gateways."""
+    proxies = _get_proxies(hass, msg.get("entry_id"))
+    if msg.get("entry_id") and not proxies:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "Uponor gateway not loaded")
+        return
+    connection.send_result(msg["id"], {entry_id: proxy.get_snapshot() for entry_id, proxy in proxies.items()})
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "uponorx265/subscribe",
+        vol.Optional("entry_id"): str,
+    }
+)
+@callback
+def websocket_subscribe(hass, connection, msg):
+    """Send the snapshot of one or all gateways, then only what changed after
+    each poll or write.
+
+    A gateway that is reloaded sends its whole snapshot again as its first diff.
+    """
+    entry_id = msg.get("entry_id")
+    proxies = _get_proxies(hass, entry_id)
+    if entry_id and not proxies:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "Uponor gateway not loaded")
+        return
+
+    @callback
+    def forward_diff(diff_entry_id, diff):
+        if entry_id is None or diff_entry_id == entry_id:
+            connection.send_message(websocket_api.event_message(msg["id"], {"entry_id": diff_entry_id, "diff": diff}))
+
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    domain_data["snapshot_subscribers"] = domain_data.get("snapshot_subscribers", 0) + 1
+    unsubscribe_dispatcher = async_dispatcher_connect(hass, SIGNAL_UPONOR_SNAPSHOT_DIFF, forward_diff)
+
+    @callback
+    def unsubscribe():
+        unsubscribe_dispatcher()
+        domain_data["snapshot_subscribers"] -= 1
+
+    connection.subscriptions[msg["id"]] = unsubscribe
+    connection.send_result(msg["id"])
+    connection.send_message(websocket_api.event_message(msg["id"], {
+        "snapshot": {
+            proxy_entry_id: proxy.async_get_subscription_snapshot() for proxy_entry_id, proxy in proxies.items()
+        },
+    }))